@@ -1,106 +1,116 @@
 # services/ai_service.py
 import os
 import json
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
 from datetime import datetime, timedelta
-from openai import OpenAI
+from functools import partial
 from dotenv import load_dotenv
+from openai_client import get_openai_client, create_chat_completion, upstream_slot, llm_stats, usage_tokens
+from prompts import build_prompt
+from llm_cache import LLMResponseCache
+from destination_table import DestinationTable
+from destination_catalog import DestinationCatalog
+from itinerary_templates import ItineraryTemplates, destination_name
+from singleflight import SingleFlight
+from jobs import BoundedExecutor, JobQueueFull
+from metrics import Counter
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
+# Initialize OpenAI client, shared with every other module through openai_client
 client = None
 try:
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
+    client = get_openai_client()
+    if not client:
         print("Warning: OPENAI_API_KEY not found in environment variables")
-    else:
-        # Initialize the client with just the API key
-        client = OpenAI(api_key=api_key)
 except Exception as e:
     print(f"Error initializing OpenAI client: {str(e)}")
     client = None
 
+# Cache of OpenAI responses keyed on the normalized request
+response_cache = LLMResponseCache(
+    max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', 1024)),
+    max_bytes=int(os.getenv('LLM_CACHE_MAX_BYTES', 16 * 1024 * 1024)),
+    ttl=int(os.getenv('LLM_CACHE_TTL', 3600))
+)
+
+# Identical requests in flight at the same time share one upstream call
+inflight_requests = SingleFlight()
+
+# Upstream calls with a latency budget run here so the caller can stop waiting
+llm_executor = BoundedExecutor(
+    max_workers=int(os.getenv('LLM_WORKERS', 16)),
+    max_pending=int(os.getenv('LLM_QUEUE_SIZE', 64)),
+    name='llm-call'
+)
+
+# Seconds an endpoint waits for OpenAI before answering with the fallback
+DESTINATION_BUDGET = float(os.getenv('LLM_BUDGET_DESTINATION', 8))
+ITINERARY_BUDGET = float(os.getenv('LLM_BUDGET_ITINERARY', 20))
+
+SYSTEM_PROMPT = "You are a helpful travel assistant."
+
+# Answers served locally instead of by OpenAI
+fallback_counter = Counter('llm_fallbacks_total', 'Answers served by a local fallback instead of OpenAI', labels=('kind',))
+
+# Completion token budget of each endpoint
+MAX_TOKENS = {
+    'destination': int(os.getenv('LLM_MAX_TOKENS_DESTINATION', 400)),
+    'itinerary': int(os.getenv('LLM_MAX_TOKENS_ITINERARY', 1000)),
+}
+DEFAULT_MAX_TOKENS = 1000
+
+DESTINATION_KEYS = ('destination', 'explanation', 'best_time', 'customs', 'safety')
+ITINERARY_KEYS = (
+    ('days', 'array of {day, morning, afternoon, evening}'), 'costs', 'transportation', 'food',
+    'cultural_experiences', 'photo_spots', 'alternatives', 'packing_list', 'health_safety'
+)
+
+# Destinations matched locally when OpenAI is not available
+destination_catalog = DestinationCatalog(
+    os.getenv('DESTINATION_CATALOG_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'destinations.json'))
+)
+destination_catalog.load()
+
+# Offline itineraries, capped so a huge duration cannot build an unbounded day list
+itinerary_templates = ItineraryTemplates(
+    max_days=int(os.getenv('ITINERARY_MAX_DAYS', 30)),
+    cache_size=int(os.getenv('ITINERARY_TEMPLATE_CACHE_SIZE', 256))
+)
+
+DEFAULT_DESTINATION = {
+    "destination": "Portugal",
+    "explanation": "Portugal provides moderate costs with mild weather.",
+    "best_time": "Spring or Fall",
+    "customs": "Standard European customs apply.",
+    "safety": "Generally safe for travelers."
+}
+
 class TravelRecommender:
     def __init__(self):
-        self.destinations_data = self._load_destinations_data()
+        self.catalog = destination_catalog
         
-    def _load_destinations_data(self):
-        # This would typically load from a database or API
-        return {
-            "destinations": [
-                {
-                    "name": "Bangkok, Thailand",
-                    "budget_level": "low",
-                    "temperature": "hot",
-                    "popular_seasons": ["spring", "summer"],
-                    "attractions": ["temples", "street food", "markets"],
-                    "avg_daily_cost": 50
-                },
-                {
-                    "name": "Paris, France",
-                    "budget_level": "high",
-                    "temperature": "mild",
-                    "popular_seasons": ["spring", "fall"],
-                    "attractions": ["museums", "architecture", "cuisine"],
-                    "avg_daily_cost": 150
-                },
-                {
-                    "name": "Tokyo, Japan",
-                    "budget_level": "medium",
-                    "temperature": "mild",
-                    "popular_seasons": ["spring", "fall"],
-                    "attractions": ["technology", "culture", "food"],
-                    "avg_daily_cost": 100
-                },
-                {
-                    "name": "New York, USA",
-                    "budget_level": "high",
-                    "temperature": "cold",
-                    "popular_seasons": ["spring", "fall"],
-                    "attractions": ["museums", "shopping", "entertainment"],
-                    "avg_daily_cost": 200
-                },
-                {
-                    "name": "Barcelona, Spain",
-                    "budget_level": "medium",
-                    "temperature": "hot",
-                    "popular_seasons": ["summer", "spring"],
-                    "attractions": ["architecture", "beaches", "food"],
-                    "avg_daily_cost": 80
-                }
-            ]
-        }
-    
     def generate_destination(self, budget, temperature, purpose, duration):
         if client:
             try:
                 # Use OpenAI for sophisticated recommendations
-                prompt = f"""
-                Based on the following criteria, suggest a travel destination:
-                - Budget: {budget}
-                - Temperature preference: {temperature}
-                - Purpose: {purpose}
-                - Duration: {duration}
-                
-                Provide a detailed response with:
-                1. Best matching destination
-                2. Brief explanation
-                3. Key attractions
-                4. Estimated daily budget
-                5. Best time to visit
-                6. Local customs to be aware of
-                7. Safety tips
-                
-                Format your response as a JSON object with these keys: destination, explanation, attractions, daily_budget, best_time, customs, safety_tips
-                """
+                prompt = build_prompt(
+                    "Suggest the best matching travel destination for these criteria.",
+                    [("Budget", budget), ("Temperature preference", temperature), ("Purpose", purpose), ("Duration", duration)],
+                    ('destination', 'explanation', 'attractions', 'daily_budget', 'best_time', 'customs', 'safety_tips')
+                )
                 
-                response = client.chat.completions.create(
+                response = create_chat_completion(
+                    client,
+                    route='recommender_destination',
                     model="gpt-3.5-turbo",
                     messages=[
                         {"role": "system", "content": "You are a travel expert providing personalized destination recommendations."},
                         {"role": "user", "content": prompt}
-                    ]
+                    ],
+                    max_tokens=MAX_TOKENS['destination']
                 )
                 
                 content = response.choices[0].message.content
@@ -110,126 +120,46 @@ class TravelRecommender:
                     except json.JSONDecodeError:
                         # If the response is not valid JSON, return it as a string
                         return {"recommendation": content}
-                return self._fallback_destination_recommendation(budget, temperature)
+                return self._fallback_destination_recommendation(budget, temperature, purpose)
                 
             except Exception as e:
                 print(f"OpenAI API error: {e}")
-                return self._fallback_destination_recommendation(budget, temperature)
+                return self._fallback_destination_recommendation(budget, temperature, purpose)
         else:
             # Fallback to rule-based system if API fails or not available
-            return self._fallback_destination_recommendation(budget, temperature)
+            return self._fallback_destination_recommendation(budget, temperature, purpose)
     
-    def _fallback_destination_recommendation(self, budget, temperature):
-        """Provide a basic destination recommendation when OpenAI API is not available"""
-        # Simple recommendation logic based on budget and temperature
-        if budget == 'Low':
-            if temperature == 'Hot':
-                return {
-                    "destination": "Tunisia",
-                    "explanation": "Tunisia offers affordable travel options with warm weather.",
-                    "best_time": "Spring or Fall",
-                    "customs": "Respect local customs and dress modestly.",
-                    "safety": "Generally safe, but be cautious in tourist areas."
-                }
-            elif temperature == 'Mild':
-                return {
-                    "destination": "Morocco",
-                    "explanation": "Morocco provides budget-friendly options with mild weather.",
-                    "best_time": "Spring or Fall",
-                    "customs": "Respect local customs and dress modestly.",
-                    "safety": "Generally safe, but be cautious in tourist areas."
-                }
-            else:  # Cold
-                return {
-                    "destination": "Romania",
-                    "explanation": "Romania offers affordable travel with cooler temperatures.",
-                    "best_time": "Summer",
-                    "customs": "Standard European customs apply.",
-                    "safety": "Generally safe for travelers."
-                }
-        elif budget == 'Medium':
-            if temperature == 'Hot':
-                return {
-                    "destination": "Spain",
-                    "explanation": "Spain offers a good balance of cost and warm weather.",
-                    "best_time": "Spring or Fall",
-                    "customs": "Standard European customs apply.",
-                    "safety": "Generally safe for travelers."
-                }
-            elif temperature == 'Mild':
-                return {
-                    "destination": "Portugal",
-                    "explanation": "Portugal provides moderate costs with mild weather.",
-                    "best_time": "Spring or Fall",
-                    "customs": "Standard European customs apply.",
-                    "safety": "Generally safe for travelers."
-                }
-            else:  # Cold
-                return {
-                    "destination": "Ireland",
-                    "explanation": "Ireland offers moderate costs with cooler temperatures.",
-                    "best_time": "Summer",
-                    "customs": "Standard European customs apply.",
-                    "safety": "Generally safe for travelers."
-                }
-        else:  # High budget
-            if temperature == 'Hot':
-                return {
-                    "destination": "Greece",
-                    "explanation": "Greece offers luxury options with warm weather.",
-                    "best_time": "Spring or Fall",
-                    "customs": "Standard European customs apply.",
-                    "safety": "Generally safe for travelers."
-                }
-            elif temperature == 'Mild':
-                return {
-                    "destination": "Italy",
-                    "explanation": "Italy provides luxury options with mild weather.",
-                    "best_time": "Spring or Fall",
-                    "customs": "Standard European customs apply.",
-                    "safety": "Generally safe for travelers."
-                }
-            else:  # Cold
-                return {
-                    "destination": "Switzerland",
-                    "explanation": "Switzerland offers luxury options with cooler temperatures.",
-                    "best_time": "Summer",
-                    "customs": "Standard European customs apply.",
-                    "safety": "Generally safe for travelers."
-                }
+    def _fallback_destination_recommendation(self, budget, temperature, purpose=None):
+        """Provide a catalog-based destination recommendation when OpenAI API is not available"""
+        recommendation = self.catalog.recommend(budget, temperature, purpose)
+        if recommendation is None:
+            fallback_counter.inc(('default_destination',))
+            return dict(DEFAULT_DESTINATION)
+        fallback_counter.inc(('destination_catalog',))
+        return recommendation
 
     def generate_itinerary(self, destination, duration, budget, purpose, travelers, preferences):
         if client:
             try:
                 # Use OpenAI for personalized itinerary generation
-                prompt = f"""
-                Create a detailed travel itinerary for:
-                Destination: {destination}
-                Duration: {duration}
-                Budget: {budget}
-                Purpose: {purpose}
-                Number of travelers: {travelers}
-                Preferences: {preferences}
-                
-                Include:
-                1. Day-by-day schedule with specific times
-                2. Recommended activities with descriptions
-                3. Local cuisine suggestions with restaurant types
-                4. Transportation tips between locations
-                5. Budget considerations with cost estimates
-                6. Cultural experiences and local events
-                7. Photo opportunities and scenic spots
-                8. Alternative options in case of bad weather
-                
-                Format your response as a JSON object with these keys: destination, duration, budget, purpose, days (array of day objects), cuisine, transportation, budget_breakdown, cultural_experiences, photo_spots, alternatives
-                """
+                prompt = build_prompt(
+                    "Create a day-by-day travel itinerary with specific times, activities, food, transport tips, "
+                    "cost estimates, cultural experiences, photo spots and bad-weather alternatives.",
+                    [("Destination", destination_name(destination)), ("Duration", duration), ("Budget", budget),
+                     ("Purpose", purpose), ("Travelers", travelers), ("Preferences", preferences)],
+                    ('destination', 'duration', 'budget', 'purpose', ITINERARY_KEYS[0], 'cuisine', 'transportation',
+                     'budget_breakdown', 'cultural_experiences', 'photo_spots', 'alternatives')
+                )
                 
-                response = client.chat.completions.create(
+                response = create_chat_completion(
+                    client,
+                    route='recommender_itinerary',
                     model="gpt-3.5-turbo",
                     messages=[
                         {"role": "system", "content": "You are a travel planner creating detailed, personalized itineraries."},
                         {"role": "user", "content": prompt}
-                    ]
+                    ],
+                    max_tokens=MAX_TOKENS['itinerary']
                 )
                 
                 content = response.choices[0].message.content
@@ -250,164 +180,76 @@ class TravelRecommender:
     
     def _generate_template_itinerary(self, destination, duration, purpose):
         """Generate a basic template itinerary when OpenAI API is not available"""
-        # Convert duration string to number of days
-        days_count = 7  # Default
-        if 'days' in duration:
-            try:
-                days_count = int(duration.split()[0])
-            except:
-                pass
-        
-        # Generate days based on purpose
-        days = []
-        for i in range(days_count):
-            day_num = i + 1
-            if purpose == 'Leisure':
-                days.append({
-                    "day": day_num,
-                    "morning": f"Breakfast at hotel, then visit {destination} city center",
-                    "afternoon": f"Lunch at a local restaurant, then explore {destination} attractions",
-                    "evening": f"Dinner at a recommended restaurant, then evening entertainment"
-                })
-            elif purpose == 'Adventure':
-                days.append({
-                    "day": day_num,
-                    "morning": f"Early breakfast, then outdoor adventure activity in {destination}",
-                    "afternoon": f"Lunch on the go, then continue adventure activities",
-                    "evening": f"Dinner at a local restaurant, then relaxation"
-                })
-            elif purpose == 'Cultural':
-                days.append({
-                    "day": day_num,
-                    "morning": f"Breakfast at hotel, then visit cultural sites in {destination}",
-                    "afternoon": f"Lunch at a local restaurant, then continue cultural exploration",
-                    "evening": f"Dinner at a traditional restaurant, then cultural performance"
-                })
-            elif purpose == 'Business':
-                days.append({
-                    "day": day_num,
-                    "morning": f"Breakfast at hotel, then business meetings in {destination}",
-                    "afternoon": f"Lunch meeting, then continue business activities",
-                    "evening": f"Dinner meeting or networking event"
-                })
-            else:  # Default
-                days.append({
-                    "day": day_num,
-                    "morning": f"Breakfast at hotel, then explore {destination}",
-                    "afternoon": f"Lunch at a local restaurant, then continue exploration",
-                    "evening": f"Dinner at a recommended restaurant, then evening activities"
-                })
-        
-        return {
-            "days": days,
-            "costs": {
-                "Accommodation": "$100-200 per night",
-                "Food": "$30-50 per day",
-                "Activities": "$20-40 per day",
-                "Transportation": "$10-30 per day"
-            },
-            "transportation": "Public transit, taxis, or rental car recommended",
-            "food": "Local restaurants and cafes recommended",
-            "cultural_experiences": [
-                f"Visit local markets in {destination}",
-                f"Experience local festivals in {destination}",
-                f"Learn about local history in {destination}"
-            ],
-            "photo_spots": [
-                f"City center of {destination}",
-                f"Local landmarks in {destination}",
-                f"Scenic viewpoints in {destination}"
-            ],
-            "alternatives": [
-                f"Indoor museums in {destination}",
-                f"Shopping centers in {destination}",
-                f"Cafes and restaurants in {destination}"
-            ],
-            "packing_list": [
-                "Comfortable walking shoes",
-                "Weather-appropriate clothing",
-                "Camera or smartphone",
-                "Travel documents",
-                "Basic first aid kit"
-            ],
-            "health_safety": [
-                f"Check travel advisories for {destination}",
-                "Keep valuables secure",
-                "Stay hydrated",
-                "Follow local health guidelines"
-            ]
-        }
+        fallback_counter.inc(('itinerary_template',))
+        return itinerary_templates.render(destination, duration, purpose)
 
 # Initialize the recommender
 travel_recommender = TravelRecommender()
 
 # Export functions
+def _destination_prompt(budget, temperature, purpose, duration):
+    """Build the OpenAI prompt for a destination recommendation"""
+    return build_prompt(
+        "Recommend a travel destination for these preferences, with why it fits, the best time to visit, "
+        "local customs and safety considerations.",
+        [("Budget", budget), ("Temperature", temperature), ("Purpose", purpose), ("Duration", duration)],
+        DESTINATION_KEYS
+    )
+
+def _itinerary_prompt(destination, duration, budget, purpose, travelers, preferences):
+    """Build the OpenAI prompt for a detailed itinerary"""
+    return build_prompt(
+        "Create a detailed travel itinerary: a day-by-day schedule with times and activities, costs, transport, "
+        "food, cultural experiences, photo spots, bad-weather alternatives, packing list and health and safety tips.",
+        [("Destination", destination_name(destination)), ("Duration", duration), ("Budget", budget),
+         ("Purpose", purpose), ("Travelers", travelers), ("Additional preferences", preferences)],
+        ITINERARY_KEYS
+    )
+
 def generate_destination(budget, temperature, purpose, duration):
     """Generate a destination recommendation based on user preferences"""
+    # Precomputed answers cover the common combinations
+    recommendation = destination_table.lookup(budget, temperature, purpose, duration)
+    if recommendation is not None:
+        return recommendation
+    
     try:
-        # Create a prompt for the OpenAI API
-        prompt = f"""
-        Recommend a travel destination based on the following preferences:
-        - Budget: {budget}
-        - Temperature: {temperature}
-        - Purpose: {purpose}
-        - Duration: {duration}
-        
-        Please provide a detailed recommendation with:
-        1. The recommended destination
-        2. Why it's a good fit for these preferences
-        3. Best time to visit
-        4. Local customs and etiquette
-        5. Safety considerations
-        
-        Format your response as a JSON object with these keys: destination, explanation, best_time, customs, safety
-        """
-        
-        # Call OpenAI API
-        content = _call_openai_api(prompt)
-        
-        if content:
-            try:
-                return json.loads(content)
-            except json.JSONDecodeError:
-                # If the response is not valid JSON, return it as a string
-                return {"destination": content}
+        recommendation = _generate_destination_live(budget, temperature, purpose, duration, budget_seconds=DESTINATION_BUDGET)
+        if recommendation:
+            return recommendation
         
         # Fallback to basic recommendation
-        return _fallback_destination_recommendation(budget, temperature)
+        return _fallback_destination_recommendation(budget, temperature, purpose)
     except Exception as e:
         print(f"Error generating destination: {str(e)}")
         # Fallback to basic recommendation
-        return _fallback_destination_recommendation(budget, temperature)
+        return _fallback_destination_recommendation(budget, temperature, purpose)
+
+def _generate_destination_live(budget, temperature, purpose, duration, budget_seconds=None, route='destination'):
+    """Ask OpenAI for a destination recommendation, returning None if there is no answer"""
+    # Create a prompt for the OpenAI API
+    prompt = _destination_prompt(budget, temperature, purpose, duration)
+    
+    # Call OpenAI API
+    # Table refreshes are recorded under their own route but share the destination budget and cache entries
+    content = _call_openai_api(prompt, route=route, max_tokens=MAX_TOKENS['destination'], budget_seconds=budget_seconds)
+    
+    if content:
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            # If the response is not valid JSON, return it as a string
+            return {"destination": content}
+    return None
 
 def generate_itinerary(destination, duration, budget, purpose, travelers, preferences):
     """Generate a detailed itinerary based on destination and preferences"""
     try:
         # Create a prompt for the OpenAI API
-        prompt = f"""
-        Create a detailed travel itinerary for {destination} with the following preferences:
-        - Duration: {duration}
-        - Budget: {budget}
-        - Purpose: {purpose}
-        - Number of travelers: {travelers}
-        - Additional preferences: {preferences}
-        
-        Please provide a comprehensive itinerary with:
-        1. Day-by-day schedule with specific times and activities
-        2. Estimated costs for each day
-        3. Transportation recommendations
-        4. Restaurant and food recommendations
-        5. Cultural experiences to try
-        6. Photo opportunities
-        7. Alternative plans in case of bad weather
-        8. Packing list recommendations
-        9. Health and safety considerations
-        
-        Format your response as a JSON object with these keys: days, costs, transportation, food, cultural_experiences, photo_spots, alternatives, packing_list, health_safety
-        """
+        prompt = _itinerary_prompt(destination, duration, budget, purpose, travelers, preferences)
         
         # Call OpenAI API
-        content = _call_openai_api(prompt)
+        content = _call_openai_api(prompt, route='itinerary', budget_seconds=ITINERARY_BUDGET)
         
         if content:
             try:
@@ -423,22 +265,44 @@ def generate_itinerary(destination, duration, budget, purpose, travelers, prefer
         # Fallback to template itinerary
         return _generate_template_itinerary(destination, duration, purpose)
 
+# Preferences that feed the destination recommendation; the itinerary also uses travelers and additional
+DESTINATION_INPUTS = ('budget', 'temperature', 'purpose', 'duration')
+
+def _plan_inputs(preferences):
+    """The generation inputs of a preferences dict, with their defaults"""
+    return {
+        'budget': preferences.get('budget', 'Medium'),
+        'temperature': preferences.get('temperature', 'Mild'),
+        'purpose': preferences.get('purpose', 'Leisure'),
+        'duration': preferences.get('duration', '7 days'),
+        'travelers': preferences.get('travelers', 1),
+        'additional': preferences.get('additional', '')
+    }
+
+def _normalized(value):
+    return value.strip().lower() if isinstance(value, str) else value
+
+def plan_changes(old_preferences, new_preferences):
+    """What a preferences edit invalidates: 'plan', 'itinerary' or None when nothing material changed"""
+    old = {k: _normalized(v) for k, v in _plan_inputs(old_preferences or {}).items()}
+    new = {k: _normalized(v) for k, v in _plan_inputs(new_preferences or {}).items()}
+    if any(old[k] != new[k] for k in DESTINATION_INPUTS):
+        return 'plan'
+    if old != new:
+        return 'itinerary'
+    return None
+
 def generate_travel_plan(preferences):
     """Generate a complete travel plan based on user preferences"""
     try:
-        # Extract preferences
-        budget = preferences.get('budget', 'Medium')
-        temperature = preferences.get('temperature', 'Mild')
-        purpose = preferences.get('purpose', 'Leisure')
-        duration = preferences.get('duration', '7 days')
-        travelers = preferences.get('travelers', 1)
-        additional = preferences.get('additional', '')
+        inputs = _plan_inputs(preferences)
         
         # Generate destination
-        destination = generate_destination(budget, temperature, purpose, duration)
+        destination = generate_destination(inputs['budget'], inputs['temperature'], inputs['purpose'], inputs['duration'])
         
         # Generate itinerary
-        itinerary = generate_itinerary(destination, duration, budget, purpose, travelers, additional)
+        itinerary = generate_itinerary(destination, inputs['duration'], inputs['budget'], inputs['purpose'],
+                                       inputs['travelers'], inputs['additional'])
         
         return {
             'destination': destination,
@@ -453,192 +317,249 @@ def generate_travel_plan(preferences):
             }
         }
 
+def regenerate_itinerary(travel_plan, preferences):
+    """Regenerate only the itinerary of a generated travel plan, keeping its destination"""
+    destination = (travel_plan or {}).get('destination')
+    if not isinstance(destination, dict):
+        # No usable destination to keep
+        return generate_travel_plan(preferences)
+    inputs = _plan_inputs(preferences)
+    itinerary = generate_itinerary(destination, inputs['duration'], inputs['budget'], inputs['purpose'],
+                                   inputs['travelers'], inputs['additional'])
+    return {
+        'destination': destination,
+        'itinerary': itinerary
+    }
+
+def stream_destination(budget, temperature, purpose, duration):
+    """Yield (event, data) pairs while a destination recommendation is generated"""
+    content = ''
+    try:
+        prompt = _destination_prompt(budget, temperature, purpose, duration)
+        for delta in _stream_openai_api(prompt, route='destination'):
+            content += delta
+            yield 'delta', {"text": delta}
+    except Exception as e:
+        print(f"Error streaming destination: {str(e)}")
+        content = ''
+    
+    if content:
+        try:
+            yield 'result', json.loads(content)
+        except json.JSONDecodeError:
+            yield 'result', {"destination": content}
+        return
+    
+    # Fallback to basic recommendation
+    yield 'result', _fallback_destination_recommendation(budget, temperature, purpose)
+
+def stream_itinerary(destination, duration, budget, purpose, travelers, preferences):
+    """Yield (event, data) pairs with each itinerary day as soon as it parses, then the full itinerary"""
+    content = ''
+    parser = _DaysStreamParser()
+    try:
+        prompt = _itinerary_prompt(destination, duration, budget, purpose, travelers, preferences)
+        for delta in _stream_openai_api(prompt, route='itinerary'):
+            content += delta
+            for day in parser.feed(delta):
+                yield 'day', day
+    except Exception as e:
+        print(f"Error streaming itinerary: {str(e)}")
+        content = ''
+    
+    if content:
+        try:
+            yield 'result', json.loads(content)
+        except json.JSONDecodeError:
+            yield 'result', {"days": [{"day": 1, "morning": content, "afternoon": "", "evening": ""}]}
+        return
+    
+    # Fallback to template itinerary, still sent day by day
+    itinerary = _generate_template_itinerary(destination, duration, purpose)
+    if parser.count == 0:
+        for day in itinerary['days']:
+            yield 'day', day
+    yield 'result', itinerary
+
+class _DaysStreamParser:
+    """Incrementally extract complete objects from the "days" array of a streamed JSON document"""
+    
+    def __init__(self):
+        self.buffer = ''
+        self.count = 0
+        self._pos = 0
+        self._in_days = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._start = None
+    
+    def feed(self, text):
+        """Add streamed text and return the day objects completed by it"""
+        days = []
+        if self._done:
+            return days
+        self.buffer += text
+        
+        if not self._in_days:
+            key = self.buffer.find('"days"')
+            if key == -1:
+                return days
+            bracket = self.buffer.find('[', key)
+            if bracket == -1:
+                return days
+            self._in_days = True
+            self._pos = bracket + 1
+        
+        while self._pos < len(self.buffer):
+            char = self.buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if self._depth == 0:
+                    self._start = self._pos
+                self._depth += 1
+            elif char in '}]':
+                if self._depth == 0:
+                    # End of the days array
+                    self._done = True
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        days.append(json.loads(self.buffer[self._start:self._pos + 1]))
+                        self.count += 1
+                    except json.JSONDecodeError:
+                        pass
+            self._pos += 1
+        return days
+
+# Precomputed destination recommendations, refreshed in the background
+destination_table = DestinationTable(
+    path=os.getenv('DESTINATION_TABLE_PATH', os.path.join('data', 'destination_table.json')),
+    generate=partial(_generate_destination_live, route='destination_table'),
+    refresh_interval=int(os.getenv('DESTINATION_TABLE_REFRESH', 86400))
+)
+destination_table.load()
+
+def start_destination_refresh():
+    """Start refreshing the precomputed destination table, only useful with an OpenAI client"""
+    if client:
+        destination_table.start()
+
 # Update the OpenAI API calls to handle client being None
-def _call_openai_api(prompt, model="gpt-3.5-turbo"):
-    """Helper function to call OpenAI API with error handling"""
+def _call_openai_api(prompt, route='other', model="gpt-3.5-turbo", temperature=0.7, max_tokens=None, budget_seconds=None):
+    """Helper function to call OpenAI API with error handling
+
+    With budget_seconds set, gives up waiting after that long and returns None so the caller
+    falls back; the upstream call keeps running and still fills the cache. max_tokens defaults
+    to the route's budget in MAX_TOKENS.
+    """
     if not client:
         return None
     
-    try:
-        response = client.chat.completions.create(
+    max_tokens = max_tokens or MAX_TOKENS.get(route, DEFAULT_MAX_TOKENS)
+    cache_key = LLMResponseCache.make_key(model, temperature, max_tokens, SYSTEM_PROMPT, prompt)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        llm_stats.record_cache_hit(route)
+        return cached
+    
+    def request_completion():
+        response = create_chat_completion(
+            client,
+            route=route,
             model=model,
             messages=[
-                {"role": "system", "content": "You are a helpful travel assistant."},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.7,
-            max_tokens=1000
+            temperature=temperature,
+            max_tokens=max_tokens
         )
-        return response.choices[0].message.content
+        content = response.choices[0].message.content
+        response_cache.set(cache_key, content)
+        return content
+    
+    try:
+        if budget_seconds is None:
+            return inflight_requests.do(cache_key, request_completion)
+        future = llm_executor.submit(inflight_requests.do, cache_key, request_completion)
+        return future.result(timeout=budget_seconds)
+    except FutureTimeout:
+        print(f"OpenAI API call exceeded its {budget_seconds}s budget")
+        return None
+    except JobQueueFull:
+        print("OpenAI API call rejected, too many calls pending")
+        return None
     except Exception as e:
         print(f"OpenAI API error: {str(e)}")
         return None
 
-def _fallback_destination_recommendation(budget, temperature):
-    """Provide a basic destination recommendation when OpenAI API is not available"""
-    # Simple recommendation logic based on budget and temperature
-    if budget == 'Low':
-        if temperature == 'Hot':
-            return {
-                "destination": "Tunisia",
-                "explanation": "Tunisia offers affordable travel options with warm weather.",
-                "best_time": "Spring or Fall",
-                "customs": "Respect local customs and dress modestly.",
-                "safety": "Generally safe, but be cautious in tourist areas."
-            }
-        elif temperature == 'Mild':
-            return {
-                "destination": "Morocco",
-                "explanation": "Morocco provides budget-friendly options with mild weather.",
-                "best_time": "Spring or Fall",
-                "customs": "Respect local customs and dress modestly.",
-                "safety": "Generally safe, but be cautious in tourist areas."
-            }
-        else:  # Cold
-            return {
-                "destination": "Romania",
-                "explanation": "Romania offers affordable travel with cooler temperatures.",
-                "best_time": "Summer",
-                "customs": "Standard European customs apply.",
-                "safety": "Generally safe for travelers."
-            }
-    elif budget == 'Medium':
-        if temperature == 'Hot':
-            return {
-                "destination": "Spain",
-                "explanation": "Spain offers a good balance of cost and warm weather.",
-                "best_time": "Spring or Fall",
-                "customs": "Standard European customs apply.",
-                "safety": "Generally safe for travelers."
-            }
-        elif temperature == 'Mild':
-            return {
-                "destination": "Portugal",
-                "explanation": "Portugal provides moderate costs with mild weather.",
-                "best_time": "Spring or Fall",
-                "customs": "Standard European customs apply.",
-                "safety": "Generally safe for travelers."
-            }
-        else:  # Cold
-            return {
-                "destination": "Ireland",
-                "explanation": "Ireland offers moderate costs with cooler temperatures.",
-                "best_time": "Summer",
-                "customs": "Standard European customs apply.",
-                "safety": "Generally safe for travelers."
-            }
-    else:  # High budget
-        if temperature == 'Hot':
-            return {
-                "destination": "Greece",
-                "explanation": "Greece offers luxury options with warm weather.",
-                "best_time": "Spring or Fall",
-                "customs": "Standard European customs apply.",
-                "safety": "Generally safe for travelers."
-            }
-        elif temperature == 'Mild':
-            return {
-                "destination": "Italy",
-                "explanation": "Italy provides luxury options with mild weather.",
-                "best_time": "Spring or Fall",
-                "customs": "Standard European customs apply.",
-                "safety": "Generally safe for travelers."
-            }
-        else:  # Cold
-            return {
-                "destination": "Switzerland",
-                "explanation": "Switzerland offers luxury options with cooler temperatures.",
-                "best_time": "Summer",
-                "customs": "Standard European customs apply.",
-                "safety": "Generally safe for travelers."
-            }
+def _stream_openai_api(prompt, route='other', model="gpt-3.5-turbo", temperature=0.7, max_tokens=None):
+    """Yield the text deltas of a streamed OpenAI completion, nothing if the client is unavailable"""
+    if not client:
+        return
+    
+    max_tokens = max_tokens or MAX_TOKENS.get(route, DEFAULT_MAX_TOKENS)
+    cache_key = LLMResponseCache.make_key(model, temperature, max_tokens, SYSTEM_PROMPT, prompt)
+    cached = response_cache.get(cache_key)
+    stream_route = f"{route}_stream"
+    if cached is not None:
+        llm_stats.record_cache_hit(stream_route)
+        yield cached
+        return
+    
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+    content = ''
+    usage = None
+    start = time.monotonic()
+    try:
+        # The upstream slot is held until the stream is consumed; a partial stream is not retried
+        with upstream_slot():
+            stream = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            for chunk in stream:
+                # The final chunk carries the usage of the whole stream and no choices
+                usage = getattr(chunk, 'usage', None) or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    content += chunk.choices[0].delta.content
+                    yield chunk.choices[0].delta.content
+    except Exception:
+        llm_stats.record_error(stream_route, time.monotonic() - start)
+        raise
+    prompt_tokens, completion_tokens, estimated = usage_tokens(usage, messages, content)
+    llm_stats.record(stream_route, time.monotonic() - start, prompt_tokens, completion_tokens, estimated)
+    response_cache.set(cache_key, content)
+
+def _fallback_destination_recommendation(budget, temperature, purpose=None):
+    """Recommend the best matching destination from the local catalog when OpenAI API is not available"""
+    recommendation = destination_catalog.recommend(budget, temperature, purpose)
+    if recommendation is None:
+        # Catalog missing or empty
+        fallback_counter.inc(('default_destination',))
+        return dict(DEFAULT_DESTINATION)
+    fallback_counter.inc(('destination_catalog',))
+    return recommendation
 
 def _generate_template_itinerary(destination, duration, purpose):
     """Generate a basic template itinerary when OpenAI API is not available"""
-    # Convert duration string to number of days
-    days_count = 7  # Default
-    if 'days' in duration:
-        try:
-            days_count = int(duration.split()[0])
-        except:
-            pass
-    
-    # Generate days based on purpose
-    days = []
-    for i in range(days_count):
-        day_num = i + 1
-        if purpose == 'Leisure':
-            days.append({
-                "day": day_num,
-                "morning": f"Breakfast at hotel, then visit {destination} city center",
-                "afternoon": f"Lunch at a local restaurant, then explore {destination} attractions",
-                "evening": f"Dinner at a recommended restaurant, then evening entertainment"
-            })
-        elif purpose == 'Adventure':
-            days.append({
-                "day": day_num,
-                "morning": f"Early breakfast, then outdoor adventure activity in {destination}",
-                "afternoon": f"Lunch on the go, then continue adventure activities",
-                "evening": f"Dinner at a local restaurant, then relaxation"
-            })
-        elif purpose == 'Cultural':
-            days.append({
-                "day": day_num,
-                "morning": f"Breakfast at hotel, then visit cultural sites in {destination}",
-                "afternoon": f"Lunch at a local restaurant, then continue cultural exploration",
-                "evening": f"Dinner at a traditional restaurant, then cultural performance"
-            })
-        elif purpose == 'Business':
-            days.append({
-                "day": day_num,
-                "morning": f"Breakfast at hotel, then business meetings in {destination}",
-                "afternoon": f"Lunch meeting, then continue business activities",
-                "evening": f"Dinner meeting or networking event"
-            })
-        else:  # Default
-            days.append({
-                "day": day_num,
-                "morning": f"Breakfast at hotel, then explore {destination}",
-                "afternoon": f"Lunch at a local restaurant, then continue exploration",
-                "evening": f"Dinner at a recommended restaurant, then evening activities"
-            })
-    
-    return {
-        "days": days,
-        "costs": {
-            "Accommodation": "$100-200 per night",
-            "Food": "$30-50 per day",
-            "Activities": "$20-40 per day",
-            "Transportation": "$10-30 per day"
-        },
-        "transportation": "Public transit, taxis, or rental car recommended",
-        "food": "Local restaurants and cafes recommended",
-        "cultural_experiences": [
-            f"Visit local markets in {destination}",
-            f"Experience local festivals in {destination}",
-            f"Learn about local history in {destination}"
-        ],
-        "photo_spots": [
-            f"City center of {destination}",
-            f"Local landmarks in {destination}",
-            f"Scenic viewpoints in {destination}"
-        ],
-        "alternatives": [
-            f"Indoor museums in {destination}",
-            f"Shopping centers in {destination}",
-            f"Cafes and restaurants in {destination}"
-        ],
-        "packing_list": [
-            "Comfortable walking shoes",
-            "Weather-appropriate clothing",
-            "Camera or smartphone",
-            "Travel documents",
-            "Basic first aid kit"
-        ],
-        "health_safety": [
-            f"Check travel advisories for {destination}",
-            "Keep valuables secure",
-            "Stay hydrated",
-            "Follow local health guidelines"
-        ]
-    }
\ No newline at end of file
+    fallback_counter.inc(('itinerary_template',))
+    return itinerary_templates.render(destination, duration, purpose)
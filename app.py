@@ -1,46 +1,242 @@
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, g, has_request_context, jsonify, request, send_from_directory, stream_with_context, url_for
+from flask.logging import default_handler
 from flask_cors import CORS
 from flask_jwt_extended.jwt_manager import JWTManager
 from flask_jwt_extended.utils import create_access_token, get_jwt_identity
 from flask_jwt_extended.view_decorators import jwt_required
 from flask_sqlalchemy import SQLAlchemy
-from datetime import timedelta, datetime
+from sqlalchemy import bindparam, event, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import deferred, load_only, undefer, undefer_group
+from datetime import timedelta, datetime, timezone
+from werkzeug.http import http_date
+import hashlib
+import hmac
 import os
 import json
+import atexit
+import time
 from dotenv import load_dotenv
-from ai_service import generate_travel_plan, generate_destination, generate_itinerary
-import logging
-from logging.handlers import RotatingFileHandler
+from ai_service import generate_travel_plan, regenerate_itinerary, plan_changes, generate_destination, generate_itinerary, stream_destination, stream_itinerary, start_destination_refresh, response_cache, inflight_requests
+from openai_client import llm_stats, upstream_breaker
+from jobs import BoundedExecutor, JobQueueFull
+from pagination import encode_cursor, decode_cursor, after_cursor, parse_limit
+from like_counter import LikeCounter
+from leaderboard import Leaderboard
+from serializers import PlanSerializer, dumps
+from passwords import PasswordHasher
+from metrics import Counter, Histogram, Collected, registry as metrics_registry
+from log_pipeline import setup_logging
+from migrations import ensure_plan_status, upgrade as upgrade_schema
+from db_engine import REPLICA_BIND, RoutingSession, engine_options, install_sqlite_pragmas, sqlite_pragmas, use_read_replica
+import uuid
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-if not os.path.exists('logs'):
-    os.makedirs('logs')
-file_handler = RotatingFileHandler('logs/travelplanner.log', maxBytes=10240, backupCount=10)
-file_handler.setFormatter(logging.Formatter(
-    '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-))
-file_handler.setLevel(logging.INFO)
-
 app = Flask(__name__)
-app.logger.addHandler(file_handler)
-app.logger.setLevel(logging.INFO)
-app.logger.info('TravelPlanner startup')
 
 # Configuration
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///travelplanner.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 10))
+app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', 20))
+app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', 1800))
+app.config['DB_POOL_TIMEOUT'] = int(os.getenv('DB_POOL_TIMEOUT', 30))
+app.config['DB_POOL_PRE_PING'] = os.getenv('DB_POOL_PRE_PING', 'True').lower() == 'true'
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', 64 * 1024 * 1024))
+app.config['DATABASE_REPLICA_URL'] = os.getenv('DATABASE_REPLICA_URL', '')  # read-only GET endpoints use it when set
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your-secret-key')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload size
+app.config['PLAN_WORKERS'] = int(os.getenv('PLAN_WORKERS', 4))
+app.config['PLAN_QUEUE_SIZE'] = int(os.getenv('PLAN_QUEUE_SIZE', 32))
+app.config['PLAN_PENDING_TIMEOUT'] = int(os.getenv('PLAN_PENDING_TIMEOUT', 300))  # seconds before a pending plan counts as abandoned
+app.config['PLAN_BATCH_WORKERS'] = int(os.getenv('PLAN_BATCH_WORKERS', 8))
+app.config['PLAN_BATCH_MAX_SIZE'] = int(os.getenv('PLAN_BATCH_MAX_SIZE', 50))
+app.config['PLANS_PAGE_SIZE'] = int(os.getenv('PLANS_PAGE_SIZE', 50))
+app.config['PLANS_MAX_PAGE_SIZE'] = int(os.getenv('PLANS_MAX_PAGE_SIZE', 200))
+app.config['LIKE_COUNTER_MODE'] = os.getenv('LIKE_COUNTER_MODE', 'atomic')  # atomic or buffered
+app.config['LIKE_FLUSH_INTERVAL'] = float(os.getenv('LIKE_FLUSH_INTERVAL', 5))
+app.config['LEADERBOARD_SIZE'] = int(os.getenv('LEADERBOARD_SIZE', 200))
+app.config['LEADERBOARD_MAX_AGE'] = float(os.getenv('LEADERBOARD_MAX_AGE', 60))
+app.config['ITINERARY_CACHE_SIZE'] = int(os.getenv('ITINERARY_CACHE_SIZE', 512))
+app.config['PASSWORD_SCRYPT_N'] = int(os.getenv('PASSWORD_SCRYPT_N', 2 ** 14))
+app.config['PASSWORD_SCRYPT_R'] = int(os.getenv('PASSWORD_SCRYPT_R', 8))
+app.config['PASSWORD_SCRYPT_P'] = int(os.getenv('PASSWORD_SCRYPT_P', 1))
+app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN', '')  # empty leaves /api/metrics and /api/llm/stats open
+app.config['LOG_FILE'] = os.getenv('LOG_FILE', 'logs/travelplanner.log')
+app.config['LOG_LEVEL'] = os.getenv('LOG_LEVEL', 'INFO').upper()
+app.config['LOG_MAX_BYTES'] = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+app.config['LOG_BACKUP_COUNT'] = int(os.getenv('LOG_BACKUP_COUNT', 10))
+# Fraction of the per-request, per-login and per-like info lines that are kept
+app.config['LOG_SAMPLE_RATES'] = {
+    'request': float(os.getenv('LOG_SAMPLE_REQUEST', 1.0)),
+    'login': float(os.getenv('LOG_SAMPLE_LOGIN', 1.0)),
+    'like': float(os.getenv('LOG_SAMPLE_LIKE', 1.0))
+}
+
+# Database engines: sized pools for server databases, SQLite is tuned through pragmas once the engines exist
+_pool_options = dict(
+    pool_size=app.config['DB_POOL_SIZE'],
+    max_overflow=app.config['DB_MAX_OVERFLOW'],
+    pool_recycle=app.config['DB_POOL_RECYCLE'],
+    pool_timeout=app.config['DB_POOL_TIMEOUT'],
+    pool_pre_ping=app.config['DB_POOL_PRE_PING']
+)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], **_pool_options)
+if app.config['DATABASE_REPLICA_URL']:
+    app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: dict(
+        engine_options(app.config['DATABASE_REPLICA_URL'], **_pool_options), url=app.config['DATABASE_REPLICA_URL']
+    )}
+
+# Configure logging: request threads only enqueue, a background listener writes JSON lines
+app.logger.setLevel(app.config['LOG_LEVEL'])
+log_listener = setup_logging(
+    app.logger,
+    app.config['LOG_FILE'],
+    max_bytes=app.config['LOG_MAX_BYTES'],
+    backup_count=app.config['LOG_BACKUP_COUNT'],
+    level=app.config['LOG_LEVEL'],
+    sample_rates=app.config['LOG_SAMPLE_RATES'],
+    console_handlers=[default_handler]
+)
+app.logger.info('TravelPlanner startup')
 
 # Initialize extensions
-CORS(app)
-db = SQLAlchemy(app)
+CORS(app, expose_headers=['X-Next-Cursor', 'ETag', 'Last-Modified', 'X-Request-ID'])
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+with app.app_context():
+    for engine in db.engines.values():
+        install_sqlite_pragmas(engine, sqlite_pragmas(
+            busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS'],
+            synchronous=app.config['SQLITE_SYNCHRONOUS'],
+            mmap_size=app.config['SQLITE_MMAP_SIZE']
+        ))
 jwt = JWTManager(app)
 
+# Background pool for asynchronous plan generation
+plan_executor = BoundedExecutor(
+    max_workers=app.config['PLAN_WORKERS'],
+    max_pending=app.config['PLAN_QUEUE_SIZE'],
+    name='plan-worker'
+)
+
+# Generation for batch requests, PLAN_BATCH_WORKERS plans at a time across all requests
+batch_executor = BoundedExecutor(
+    max_workers=app.config['PLAN_BATCH_WORKERS'],
+    max_pending=app.config['PLAN_BATCH_WORKERS'] + app.config['PLAN_BATCH_MAX_SIZE'],
+    name='plan-batch'
+)
+
+# Password hashing runs on its own bounded pool
+password_hasher = PasswordHasher(
+    n=app.config['PASSWORD_SCRYPT_N'],
+    r=app.config['PASSWORD_SCRYPT_R'],
+    p=app.config['PASSWORD_SCRYPT_P'],
+    max_workers=app.config['PASSWORD_HASH_WORKERS']
+)
+
+# Keep the precomputed destination table up to date
+start_destination_refresh()
+
+# Metrics, served in Prometheus format at /api/metrics
+http_requests = Counter('http_requests_total', 'HTTP requests by method, route and status', labels=('method', 'route', 'status'))
+http_latency = Histogram('http_request_duration_seconds', 'Time to produce a response, by method and route', labels=('method', 'route'))
+request_statements = Histogram(
+    'http_request_db_statements', 'SQL statements executed per request, by route',
+    labels=('route',), buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+request_db_time = Histogram('http_request_db_seconds', 'Time spent in SQL per request, by route', labels=('route',))
+db_statements = Counter('db_statements_total', 'SQL statements executed')
+db_time = Counter('db_statement_seconds_total', 'Time spent executing SQL statements')
+db_errors = Counter('db_errors_total', 'SQL statements that raised an error')
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    db_statements.inc()
+    db_time.inc(amount=elapsed)
+    if has_request_context() and 'sql' in g:
+        g.sql[0] += 1
+        g.sql[1] += elapsed
+
+def _handle_db_error(context):
+    if context.connection is not None and context.connection.info.get('query_start'):
+        context.connection.info['query_start'].pop()
+    db_errors.inc()
+
+def instrument_engine(engine):
+    """Count SQL statements and their time on an engine"""
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_db_error)
+
+with app.app_context():
+    for engine in db.engines.values():
+        instrument_engine(engine)
+
+def _route_label():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def _start_request():
+    g.request_start = time.perf_counter()
+    g.request_id = request.headers.get('X-Request-ID', '')[:64] or uuid.uuid4().hex
+    g.sql = [0, 0.0]
+
+@app.after_request
+def _finish_request(response):
+    """Record metrics and the access log line; streamed responses are timed up to their first byte"""
+    if 'request_start' in g:
+        elapsed = time.perf_counter() - g.request_start
+        route = _route_label()
+        http_latency.observe(elapsed, (request.method, route))
+        http_requests.inc((request.method, route, str(response.status_code)))
+        request_statements.observe(g.sql[0], (route,))
+        request_db_time.observe(g.sql[1], (route,))
+        response.headers['X-Request-ID'] = g.request_id
+        app.logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+            'event': 'request',
+            'status': response.status_code,
+            'latency_ms': round(elapsed * 1e3, 1),
+            'db_statements': g.sql[0],
+            'db_ms': round(g.sql[1] * 1e3, 1)
+        })
+    return response
+
+def _llm_totals(*keys):
+    def collect():
+        return {
+            (route,) + ((key,) if len(keys) > 1 else ()): totals[key]
+            for route, totals in llm_stats.totals().items() for key in keys
+        }
+    return collect
+
+Collected('llm_requests_total', 'Completed LLM calls by route', _llm_totals('calls'), type='counter', labels=('route',))
+Collected('llm_errors_total', 'Failed LLM calls by route', _llm_totals('errors'), type='counter', labels=('route',))
+Collected('llm_cache_hits_total', 'LLM calls answered from the response cache, by route', _llm_totals('cache_hits'), type='counter', labels=('route',))
+Collected(
+    'llm_tokens_total', 'LLM tokens used by route and kind', _llm_totals('prompt_tokens', 'completion_tokens'),
+    type='counter', labels=('route', 'kind')
+)
+Collected('llm_cache_entries', 'Entries in the LLM response cache', lambda: {(): response_cache.stats()['entries']})
+Collected('llm_cache_bytes', 'Approximate size of the LLM response cache', lambda: {(): response_cache.stats()['bytes']})
+Collected('llm_cache_evictions_total', 'Entries evicted from the LLM response cache', lambda: {(): response_cache.stats()['evictions']}, type='counter')
+Collected('llm_inflight_requests', 'Distinct LLM requests currently in flight', lambda: {(): inflight_requests.stats()['in_flight']})
+Collected('llm_coalesced_total', 'LLM requests that joined an identical in-flight request', lambda: {(): inflight_requests.stats()['coalesced']}, type='counter')
+Collected(
+    'llm_breaker_open', 'Whether the OpenAI circuit breaker is open (1), half-open (0.5) or closed (0)',
+    lambda: {(): {'open': 1, 'half_open': 0.5}.get(upstream_breaker.stats()['state'], 0)}
+)
+Collected('llm_breaker_rejected_total', 'Calls rejected by the open circuit breaker', lambda: {(): upstream_breaker.stats()['rejected']}, type='counter')
+Collected('llm_breaker_trips_total', 'Times the circuit breaker opened', lambda: {(): upstream_breaker.stats()['trips']}, type='counter')
+
 # Models
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -57,6 +253,12 @@ class User(db.Model):
         self.full_name = full_name
 
 class TravelPlan(db.Model):
+    # Keep in step with migrations.py, which adds these to existing databases
+    __table_args__ = (
+        db.Index('ix_travel_plan_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_travel_plan_public_likes', 'is_public', 'likes', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     title = db.Column(db.String(120), nullable=False)
@@ -64,14 +266,16 @@ class TravelPlan(db.Model):
     start_date = db.Column(db.DateTime, nullable=False)
     end_date = db.Column(db.DateTime, nullable=False)
     budget = db.Column(db.Float, nullable=False)
-    preferences = db.Column(db.JSON, nullable=False)
-    itinerary = db.Column(db.JSON, nullable=True)
+    # The JSON payload is only loaded by the views that return it, see PLAN_PAYLOAD
+    preferences = deferred(db.Column(db.JSON, nullable=False), group='payload')
+    itinerary = deferred(db.Column(db.JSON, nullable=True), group='payload')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_public = db.Column(db.Boolean, default=False)
     likes = db.Column(db.Integer, default=0)
+    status = db.Column(db.String(20), nullable=False, default='ready')  # pending, ready or failed
 
-    def __init__(self, user_id, title, destination, start_date, end_date, budget, preferences, itinerary=None, is_public=False):
+    def __init__(self, user_id, title, destination, start_date, end_date, budget, preferences, itinerary=None, is_public=False, status='ready'):
         self.user_id = user_id
         self.title = title
         self.destination = destination
@@ -81,8 +285,17 @@ class TravelPlan(db.Model):
         self.preferences = preferences
         self.itinerary = itinerary
         self.is_public = is_public
+        self.status = status
+
+# Loader option for the deferred JSON columns of TravelPlan
+PLAN_PAYLOAD = undefer_group('payload')
 
 class Favorite(db.Model):
+    __table_args__ = (
+        db.Index('uq_favorite_user_plan', 'user_id', 'plan_id', unique=True),
+        db.Index('ix_favorite_user_created', 'user_id', 'created_at', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     plan_id = db.Column(db.Integer, db.ForeignKey('travel_plan.id'), nullable=False)
@@ -92,6 +305,106 @@ class Favorite(db.Model):
         self.user_id = user_id
         self.plan_id = plan_id
 
+def _flush_likes(deltas):
+    """Apply buffered like increments in one batched UPDATE"""
+    table = TravelPlan.__table__
+    with app.app_context():
+        db.session.execute(
+            table.update().where(table.c.id == bindparam('plan_id')).values(likes=table.c.likes + bindparam('delta')),
+            [{'plan_id': plan_id, 'delta': delta} for plan_id, delta in deltas.items()]
+        )
+        db.session.commit()
+
+# Likes are either incremented atomically in SQL or buffered and flushed periodically
+like_counter = LikeCounter(_flush_likes, interval=app.config['LIKE_FLUSH_INTERVAL'])
+if app.config['LIKE_COUNTER_MODE'] == 'buffered':
+    like_counter.start()
+    atexit.register(like_counter.stop)
+
+# Single serialization path for every plan response
+plan_serializer = PlanSerializer(likes_delta=like_counter.pending, cache_size=app.config['ITINERARY_CACHE_SIZE'])
+
+def _json_response(body, status=200, headers=None):
+    """Wrap already encoded JSON bytes in a response"""
+    return Response(body, status=status, headers=headers, mimetype='application/json')
+
+def _etag(*parts):
+    """Strong ETag built from the values that determine a representation"""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:32]
+
+def _validators(etag, last_modified=None):
+    """ETag and Last-Modified headers for a response
+
+    Lists pass no last_modified: removing a plan or favorite changes a list without moving any
+    timestamp, so only their ETag, which includes the row count, can validate them.
+    """
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
+    if last_modified:
+        headers['Last-Modified'] = http_date(last_modified.replace(tzinfo=timezone.utc))
+    return headers
+
+def _not_modified(etag, last_modified=None):
+    """Whether the request's If-None-Match / If-Modified-Since match the current representation"""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= request.if_modified_since
+    return False
+
+def _plan_response(message, plan, status=200, headers=None):
+    """Respond with a message and the detail view of a plan"""
+    body = dumps({"message": message})[:-1] + b',"plan":' + plan_serializer.encode(plan, plan_serializer.fields('detail')) + b'}'
+    return _json_response(body, status=status, headers=headers)
+
+def _requested_fields(view):
+    """Parse ?fields= into a list of plan fields, defaulting to a serializer view"""
+    value = request.args.get('fields')
+    if not value:
+        return list(plan_serializer.fields(view))
+    fields = [f.strip() for f in value.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in PlanSerializer.FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def _plan_columns(fields, *required):
+    """Columns to load from the database for the requested fields and sort keys"""
+    names = set(fields) | set(required)
+    if 'itinerary' in names:
+        # The encoded itinerary is cached per revision
+        names.add('updated_at')
+    return [getattr(TravelPlan, name) for name in PlanSerializer.FIELDS if name in names]
+
+# Most liked public plans, kept in memory so first pages skip the database
+leaderboard = Leaderboard(size=app.config['LEADERBOARD_SIZE'], max_age=app.config['LEADERBOARD_MAX_AGE'])
+
+def _rebuild_leaderboard():
+    """Reload the leaderboard from the database"""
+    plans = TravelPlan.query.filter_by(is_public=True).options(PLAN_PAYLOAD).order_by(
+        TravelPlan.likes.desc(), TravelPlan.id.desc()
+    ).limit(leaderboard.size + 1).all()
+    leaderboard.rebuild(
+        [plan_serializer.to_dict(plan, PlanSerializer.FIELDS) for plan in plans],
+        complete=len(plans) <= leaderboard.size
+    )
+
+def _sync_leaderboard(plan):
+    """Reflect a created, updated or liked plan on the leaderboard"""
+    if not plan.is_public:
+        leaderboard.remove(plan.id)
+        return
+    data = plan_serializer.to_dict(plan, PlanSerializer.FIELDS)
+    if plan.id in leaderboard or leaderboard.qualifies(data['likes'], plan.id):
+        leaderboard.upsert(data)
+
+def _plan_page(plans, limit, fields, sort_key):
+    """Build a list response, passing the cursor of the next page in X-Next-Cursor"""
+    headers = {}
+    if len(plans) > limit:
+        plans = plans[:limit]
+        headers['X-Next-Cursor'] = encode_cursor(sort_key(plans[-1]))
+    return _json_response(plan_serializer.encode_many(plans, fields), headers=headers)
+
 # Error handlers
 @app.errorhandler(404)
 def not_found_error(error):
@@ -100,7 +413,7 @@ def not_found_error(error):
 @app.errorhandler(500)
 def internal_error(error):
     db.session.rollback()
-    app.logger.error(f'Server Error: {error}')
+    app.logger.error('Server Error: %s', error)
     return jsonify({"error": "Internal server error"}), 500
 
 @app.errorhandler(413)
@@ -116,6 +429,30 @@ def health_check():
         "timestamp": datetime.utcnow().isoformat()
     }), 200
 
+def _metrics_authorized():
+    """Whether the request carries METRICS_TOKEN, always true when no token is configured"""
+    token = app.config['METRICS_TOKEN']
+    return not token or hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode())
+
+@app.route('/api/llm/stats', methods=['GET'])
+def get_llm_stats():
+    """Token usage and latency of LLM calls per route, with cache and circuit breaker state"""
+    if not _metrics_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify({
+        "routes": llm_stats.stats(),
+        "cache": response_cache.stats(),
+        "inflight": inflight_requests.stats(),
+        "breaker": upstream_breaker.stats()
+    }), 200
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Process metrics in the Prometheus text format; under gunicorn each worker reports its own"""
+    if not _metrics_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    return Response(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/auth/signup', methods=['POST'])
 def signup():
     try:
@@ -129,14 +466,14 @@ def signup():
         
         user = User(
             email=data['email'],
-            password=data['password'],  # In production, hash the password
+            password=password_hasher.hash(data['password']),
             full_name=data['full_name']
         )
         
         db.session.add(user)
         db.session.commit()
         
-        app.logger.info(f'New user registered: {user.email}')
+        app.logger.info('New user registered: %s', user.email)
         
         access_token = create_access_token(identity=user.id)
         return jsonify({
@@ -148,8 +485,11 @@ def signup():
                 "full_name": user.full_name
             }
         }), 201
+    except JobQueueFull:
+        db.session.rollback()
+        return jsonify({"error": "Server busy, please retry later"}), 503, {'Retry-After': '1'}
     except Exception as e:
-        app.logger.error(f'Error in signup: {str(e)}')
+        app.logger.error('Error in signup: %s', e)
         db.session.rollback()
         return jsonify({"error": "Registration failed"}), 500
 
@@ -163,10 +503,20 @@ def login():
         
         user = User.query.filter_by(email=data['email']).first()
         
-        if not user or user.password != data['password']:  # In production, verify hashed password
+        if user:
+            valid, new_hash = password_hasher.verify(data['password'], user.password)
+        else:
+            # Unknown emails cost the same scrypt derivation as wrong passwords
+            valid, new_hash = password_hasher.verify_missing(data['password'])
+        if not valid:
             return jsonify({"error": "Invalid credentials"}), 401
         
-        app.logger.info(f'User logged in: {user.email}')
+        if new_hash:
+            # Cost parameters changed or the password predates hashing
+            user.password = new_hash
+            db.session.commit()
+        
+        app.logger.info('User logged in: %s', user.email, extra={'event': 'login'})
         
         access_token = create_access_token(identity=user.id)
         return jsonify({
@@ -178,8 +528,11 @@ def login():
                 "full_name": user.full_name
             }
         }), 200
+    except JobQueueFull:
+        return jsonify({"error": "Server busy, please retry later"}), 503, {'Retry-After': '1'}
     except Exception as e:
-        app.logger.error(f'Error in login: {str(e)}')
+        app.logger.error('Error in login: %s', e)
+        db.session.rollback()
         return jsonify({"error": "Login failed"}), 500
 
 @app.route('/api/plans', methods=['POST'])
@@ -189,101 +542,289 @@ def create_plan():
         current_user_id = get_jwt_identity()
         data = request.get_json()
         
-        if not data or not all(k in data for k in ('title', 'destination', 'start_date', 'end_date', 'budget', 'preferences')):
+        if not data or not all(k in data for k in PLAN_FIELDS):
             return jsonify({"error": "Missing required fields"}), 400
         
+        if request.args.get('async', 'false').lower() == 'true':
+            return _create_plan_async(current_user_id, data)
+        
         # Generate AI-powered travel plan
         ai_plan = generate_travel_plan(data['preferences'])
         
-        plan = TravelPlan(
-            user_id=current_user_id,
-            title=data['title'],
-            destination=data['destination'],
-            start_date=datetime.fromisoformat(data['start_date']),
-            end_date=datetime.fromisoformat(data['end_date']),
-            budget=data['budget'],
-            preferences=data['preferences'],
-            itinerary=ai_plan,
-            is_public=data.get('is_public', False)
-        )
+        plan = _new_plan(current_user_id, data, itinerary=ai_plan)
         
         db.session.add(plan)
         db.session.commit()
+        _sync_leaderboard(plan)
         
-        app.logger.info(f'New travel plan created: {plan.title} by user {current_user_id}')
+        app.logger.info('New travel plan created: %s by user %s', plan.title, current_user_id)
         
-        return jsonify({
-            "message": "Plan created successfully",
-            "plan": {
-                "id": plan.id,
-                "title": plan.title,
-                "destination": plan.destination,
-                "start_date": plan.start_date.isoformat(),
-                "end_date": plan.end_date.isoformat(),
-                "budget": plan.budget,
-                "preferences": plan.preferences,
-                "itinerary": plan.itinerary,
-                "created_at": plan.created_at.isoformat(),
-                "is_public": plan.is_public
-            }
-        }), 201
+        return _plan_response("Plan created successfully", plan, status=201)
     except Exception as e:
-        app.logger.error(f'Error creating plan: {str(e)}')
+        app.logger.error('Error creating plan: %s', e)
         db.session.rollback()
         return jsonify({"error": "Failed to create plan"}), 500
 
+PLAN_FIELDS = ('title', 'destination', 'start_date', 'end_date', 'budget', 'preferences')
+
+def _new_plan(current_user_id, data, **fields):
+    """Build an unsaved TravelPlan from a request body, raising ValueError on bad dates"""
+    return TravelPlan(
+        user_id=current_user_id,
+        title=data['title'],
+        destination=data['destination'],
+        start_date=datetime.fromisoformat(data['start_date']),
+        end_date=datetime.fromisoformat(data['end_date']),
+        budget=data['budget'],
+        preferences=data['preferences'],
+        is_public=data.get('is_public', False),
+        **fields
+    )
+
+def _create_plan_async(current_user_id, data):
+    """Save a pending plan and hand itinerary generation to the worker pool"""
+    plan = _new_plan(current_user_id, data, status='pending')
+    
+    db.session.add(plan)
+    db.session.commit()
+    _sync_leaderboard(plan)
+    
+    try:
+        plan_executor.submit(_generate_plan_itinerary, plan.id, data['preferences'])
+    except JobQueueFull:
+        db.session.delete(plan)
+        db.session.commit()
+        leaderboard.remove(plan.id)
+        app.logger.warning('Plan generation queue full, rejected plan for user %s', current_user_id)
+        return jsonify({"error": "Plan generation is busy, please retry later"}), 503, {'Retry-After': '5'}
+    
+    app.logger.info('Travel plan queued: %s by user %s', plan.title, current_user_id)
+    
+    status_url = url_for('get_plan_status', plan_id=plan.id)
+    return jsonify({
+        "message": "Plan generation started",
+        "job_id": plan.id,
+        "status": plan.status,
+        "status_url": status_url
+    }), 202, {'Location': status_url}
+
+def _resume_abandoned_plans(plan_id=None):
+    """Re-queue plans left pending longer than PLAN_PENDING_TIMEOUT, returning how many were resumed
+
+    Generation jobs only live in the memory of the worker that accepted them, so a restart or crash
+    strands its plans. Each plan is claimed with a conditional UPDATE, so only one worker re-queues
+    it; if the queue is full it is marked failed instead.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=app.config['PLAN_PENDING_TIMEOUT'])
+    abandoned = db.session.query(TravelPlan.id).filter(TravelPlan.status == 'pending', TravelPlan.updated_at < cutoff)
+    if plan_id is not None:
+        abandoned = abandoned.filter(TravelPlan.id == plan_id)
+    resumed = 0
+    for (abandoned_id,) in abandoned.all():
+        claimed = TravelPlan.query.filter(
+            TravelPlan.id == abandoned_id, TravelPlan.status == 'pending', TravelPlan.updated_at < cutoff
+        ).update({'updated_at': datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        if not claimed:
+            continue
+        preferences = db.session.query(TravelPlan.preferences).filter(TravelPlan.id == abandoned_id).scalar()
+        try:
+            plan_executor.submit(_generate_plan_itinerary, abandoned_id, preferences)
+            app.logger.warning('Re-queued abandoned plan %s', abandoned_id)
+        except JobQueueFull:
+            TravelPlan.query.filter_by(id=abandoned_id).update({'status': 'failed'}, synchronize_session=False)
+            db.session.commit()
+            app.logger.warning('Plan generation queue full, marked abandoned plan %s failed', abandoned_id)
+        resumed += 1
+    return resumed
+
+def _generate_plan_itinerary(plan_id, preferences, current_itinerary=None):
+    """Fill in the itinerary of a pending plan, run from the worker pool
+
+    With current_itinerary set, keeps its destination and only regenerates the itinerary.
+    """
+    with app.app_context():
+        try:
+            if current_itinerary is None:
+                itinerary = generate_travel_plan(preferences)
+            else:
+                itinerary = regenerate_itinerary(current_itinerary, preferences)
+            plan = db.session.get(TravelPlan, plan_id, options=[undefer(TravelPlan.preferences)])
+            if plan is None:
+                # Deleted while it was being generated
+                return
+            if plan_changes(preferences, plan.preferences) is not None:
+                # Edited again meanwhile, the job for the newer preferences saves its own result
+                return
+            plan.itinerary = itinerary
+            plan.status = 'ready'
+            db.session.commit()
+            _sync_leaderboard(plan)
+            app.logger.info('Travel plan generated: %s', plan_id)
+        except Exception as e:
+            app.logger.error('Error generating plan %s: %s', plan_id, e)
+            db.session.rollback()
+            current = db.session.query(TravelPlan.preferences).filter(TravelPlan.id == plan_id).first()
+            if current is not None and plan_changes(preferences, current.preferences) is None:
+                # Leave plans edited meanwhile to the job for the newer preferences
+                TravelPlan.query.filter_by(id=plan_id).update({'status': 'failed'})
+                db.session.commit()
+
+@app.route('/api/plans/batch', methods=['POST'])
+@jwt_required()
+def create_plans_batch():
+    try:
+        current_user_id = get_jwt_identity()
+        data = request.get_json()
+        specs = data.get('plans') if isinstance(data, dict) else None
+        
+        if not isinstance(specs, list) or not specs:
+            return jsonify({"error": "Missing plans"}), 400
+        if len(specs) > app.config['PLAN_BATCH_MAX_SIZE']:
+            return jsonify({"error": f"At most {app.config['PLAN_BATCH_MAX_SIZE']} plans per batch"}), 400
+        
+        # Validate everything up front, then generate the valid plans concurrently
+        results = [None] * len(specs)
+        plans = {}
+        futures = {}
+        for index, spec in enumerate(specs):
+            if not isinstance(spec, dict) or not all(k in spec for k in PLAN_FIELDS):
+                results[index] = {"index": index, "error": "Missing required fields"}
+                continue
+            if not isinstance(spec['preferences'], dict):
+                results[index] = {"index": index, "error": "preferences must be an object"}
+                continue
+            try:
+                plans[index] = _new_plan(current_user_id, spec)
+            except (TypeError, ValueError):
+                results[index] = {"index": index, "error": "Invalid start_date or end_date"}
+                continue
+            try:
+                futures[index] = batch_executor.submit(generate_travel_plan, spec['preferences'])
+            except JobQueueFull:
+                del plans[index]
+                results[index] = {"index": index, "error": "Plan generation is busy, please retry later"}
+        
+        for index, future in futures.items():
+            try:
+                plans[index].itinerary = future.result()
+            except Exception as e:
+                app.logger.error('Error generating batch plan %s: %s', index, e)
+                del plans[index]
+                results[index] = {"index": index, "error": "Failed to generate plan"}
+        
+        # One transaction for every generated plan
+        db.session.add_all(plans.values())
+        db.session.commit()
+        
+        fields = plan_serializer.fields('detail')
+        for index, plan in plans.items():
+            _sync_leaderboard(plan)
+            results[index] = {"index": index, "plan": plan_serializer.to_dict(plan, fields)}
+        
+        app.logger.info('Batch of %s plans by user %s: %s created', len(specs), current_user_id, len(plans))
+        
+        status = 201 if len(plans) == len(specs) else 207
+        return _json_response(dumps({
+            "created": len(plans),
+            "failed": len(specs) - len(plans),
+            "results": results
+        }), status=status)
+    except Exception as e:
+        app.logger.error('Error creating plan batch: %s', e)
+        db.session.rollback()
+        return jsonify({"error": "Failed to create plans"}), 500
+
+@app.route('/api/plans/<int:plan_id>/status', methods=['GET'])
+@jwt_required()
+def get_plan_status(plan_id):
+    try:
+        current_user_id = get_jwt_identity()
+        plan = TravelPlan.query.get_or_404(plan_id)
+        
+        if plan.user_id != current_user_id and not plan.is_public:
+            return jsonify({"error": "Access denied"}), 403
+        
+        if plan.status == 'pending' and _resume_abandoned_plans(plan_id):
+            db.session.refresh(plan)
+        
+        return jsonify({
+            "job_id": plan.id,
+            "status": plan.status,
+            "plan_url": url_for('get_plan', plan_id=plan.id)
+        }), 200
+    except Exception as e:
+        app.logger.error('Error fetching plan status %s: %s', plan_id, e)
+        return jsonify({"error": "Failed to fetch plan status"}), 500
+
 @app.route('/api/plans', methods=['GET'])
 @jwt_required()
+@use_read_replica
 def get_plans():
     try:
         current_user_id = get_jwt_identity()
-        plans = TravelPlan.query.filter_by(user_id=current_user_id).all()
-        
-        return jsonify([{
-            "id": plan.id,
-            "title": plan.title,
-            "destination": plan.destination,
-            "start_date": plan.start_date.isoformat(),
-            "end_date": plan.end_date.isoformat(),
-            "budget": plan.budget,
-            "preferences": plan.preferences,
-            "itinerary": plan.itinerary,
-            "created_at": plan.created_at.isoformat(),
-            "updated_at": plan.updated_at.isoformat(),
-            "is_public": plan.is_public,
-            "likes": plan.likes
-        } for plan in plans]), 200
+        
+        try:
+            fields = _requested_fields('detail')
+            limit = parse_limit(request.args.get('limit'), app.config['PLANS_PAGE_SIZE'], app.config['PLANS_MAX_PAGE_SIZE'])
+            cursor = request.args.get('cursor')
+            cursor = decode_cursor(cursor, (datetime, int)) if cursor else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Aggregate validators from a metadata-only query
+        count, updated_at = db.session.query(
+            func.count(TravelPlan.id), func.max(TravelPlan.updated_at)
+        ).filter(TravelPlan.user_id == current_user_id).one()
+        etag = _etag('plans', current_user_id, count, updated_at, like_counter.version, sorted(request.args.items()))
+        headers = _validators(etag)
+        if _not_modified(etag):
+            return Response(status=304, headers=headers)
+        
+        # Keyset pagination on (created_at, id), newest first
+        query = TravelPlan.query.filter_by(user_id=current_user_id).options(
+            load_only(*_plan_columns(fields, 'created_at'))
+        )
+        if cursor:
+            query = query.filter(after_cursor((TravelPlan.created_at, TravelPlan.id), cursor))
+        plans = query.order_by(TravelPlan.created_at.desc(), TravelPlan.id.desc()).limit(limit + 1).all()
+        
+        response = _plan_page(plans, limit, fields, lambda plan: (plan.created_at, plan.id))
+        response.headers.update(headers)
+        return response
     except Exception as e:
-        app.logger.error(f'Error fetching plans: {str(e)}')
+        app.logger.error('Error fetching plans: %s', e)
         return jsonify({"error": "Failed to fetch plans"}), 500
 
 @app.route('/api/plans/<int:plan_id>', methods=['GET'])
 @jwt_required()
+@use_read_replica
 def get_plan(plan_id):
     try:
         current_user_id = get_jwt_identity()
-        plan = TravelPlan.query.get_or_404(plan_id)
+        
+        # Check access and freshness before loading the itinerary
+        meta = db.session.query(
+            TravelPlan.user_id, TravelPlan.is_public, TravelPlan.updated_at
+        ).filter(TravelPlan.id == plan_id).first()
+        if meta is None:
+            return jsonify({"error": "Resource not found"}), 404
         
         # Check if the plan belongs to the user or is public
-        if plan.user_id != current_user_id and not plan.is_public:
+        if meta.user_id != current_user_id and not meta.is_public:
             return jsonify({"error": "Access denied"}), 403
         
-        return jsonify({
-            "id": plan.id,
-            "title": plan.title,
-            "destination": plan.destination,
-            "start_date": plan.start_date.isoformat(),
-            "end_date": plan.end_date.isoformat(),
-            "budget": plan.budget,
-            "preferences": plan.preferences,
-            "itinerary": plan.itinerary,
-            "created_at": plan.created_at.isoformat(),
-            "updated_at": plan.updated_at.isoformat(),
-            "is_public": plan.is_public,
-            "likes": plan.likes
-        }), 200
+        etag = _etag('plan', plan_id, meta.updated_at, like_counter.pending(plan_id))
+        headers = _validators(etag, meta.updated_at)
+        if _not_modified(etag, meta.updated_at):
+            return Response(status=304, headers=headers)
+        
+        # A cached itinerary encoding for this revision saves loading the itinerary column
+        payload = undefer(TravelPlan.preferences) if plan_serializer.has_itinerary(plan_id, meta.updated_at) else PLAN_PAYLOAD
+        plan = TravelPlan.query.options(payload).get_or_404(plan_id)
+        return _json_response(plan_serializer.encode(plan, plan_serializer.fields('detail')), headers=headers)
     except Exception as e:
-        app.logger.error(f'Error fetching plan {plan_id}: {str(e)}')
+        app.logger.error('Error fetching plan %s: %s', plan_id, e)
         return jsonify({"error": "Failed to fetch plan"}), 500
 
 @app.route('/api/plans/<int:plan_id>', methods=['PUT'])
@@ -291,7 +832,7 @@ def get_plan(plan_id):
 def update_plan(plan_id):
     try:
         current_user_id = get_jwt_identity()
-        plan = TravelPlan.query.get_or_404(plan_id)
+        plan = TravelPlan.query.options(PLAN_PAYLOAD).get_or_404(plan_id)
         
         # Check if the plan belongs to the user
         if plan.user_id != current_user_id:
@@ -299,6 +840,14 @@ def update_plan(plan_id):
         
         data = request.get_json()
         
+        # Only regenerate what the changed preferences feed into
+        regenerate = None
+        if 'preferences' in data:
+            if not isinstance(data['preferences'], dict):
+                return jsonify({"error": "preferences must be an object"}), 400
+            regenerate = plan_changes(plan.preferences, data['preferences'])
+            current_itinerary = plan.itinerary
+        
         if 'title' in data:
             plan.title = data['title']
         if 'destination' in data:
@@ -311,32 +860,33 @@ def update_plan(plan_id):
             plan.budget = data['budget']
         if 'preferences' in data:
             plan.preferences = data['preferences']
-            # Regenerate itinerary if preferences change
-            plan.itinerary = generate_travel_plan(data['preferences'])
         if 'is_public' in data:
             plan.is_public = data['is_public']
+        if regenerate:
+            plan.status = 'pending'
         
         db.session.commit()
+        _sync_leaderboard(plan)
         
-        app.logger.info(f'Plan updated: {plan.title} by user {current_user_id}')
+        app.logger.info('Plan updated: %s by user %s', plan.title, current_user_id)
         
-        return jsonify({
-            "message": "Plan updated successfully",
-            "plan": {
-                "id": plan.id,
-                "title": plan.title,
-                "destination": plan.destination,
-                "start_date": plan.start_date.isoformat(),
-                "end_date": plan.end_date.isoformat(),
-                "budget": plan.budget,
-                "preferences": plan.preferences,
-                "itinerary": plan.itinerary,
-                "updated_at": plan.updated_at.isoformat(),
-                "is_public": plan.is_public
-            }
-        }), 200
+        if not regenerate:
+            return _plan_response("Plan updated successfully", plan)
+        
+        job_itinerary = current_itinerary if regenerate == 'itinerary' else None
+        try:
+            plan_executor.submit(_generate_plan_itinerary, plan.id, plan.preferences, job_itinerary)
+        except JobQueueFull:
+            # Pool saturated, regenerate inline as before rather than leave a stale itinerary
+            app.logger.warning('Plan generation queue full, regenerating plan %s inline', plan_id)
+            _generate_plan_itinerary(plan.id, plan.preferences, job_itinerary)
+            db.session.refresh(plan)
+            return _plan_response("Plan updated successfully", plan)
+        
+        status_url = url_for('get_plan_status', plan_id=plan.id)
+        return _plan_response("Plan updated, regeneration started", plan, status=202, headers={'Location': status_url})
     except Exception as e:
-        app.logger.error(f'Error updating plan {plan_id}: {str(e)}')
+        app.logger.error('Error updating plan %s: %s', plan_id, e)
         db.session.rollback()
         return jsonify({"error": "Failed to update plan"}), 500
 
@@ -353,88 +903,132 @@ def delete_plan(plan_id):
         
         db.session.delete(plan)
         db.session.commit()
+        like_counter.discard(plan_id)
+        leaderboard.remove(plan_id)
         
-        app.logger.info(f'Plan deleted: {plan.title} by user {current_user_id}')
+        app.logger.info('Plan deleted: %s by user %s', plan.title, current_user_id)
         
         return jsonify({"message": "Plan deleted successfully"}), 200
     except Exception as e:
-        app.logger.error(f'Error deleting plan {plan_id}: {str(e)}')
+        app.logger.error('Error deleting plan %s: %s', plan_id, e)
         db.session.rollback()
         return jsonify({"error": "Failed to delete plan"}), 500
 
 @app.route('/api/plans/public', methods=['GET'])
+@use_read_replica
 def get_public_plans():
     try:
-        plans = TravelPlan.query.filter_by(is_public=True).order_by(TravelPlan.likes.desc()).all()
-        
-        return jsonify([{
-            "id": plan.id,
-            "title": plan.title,
-            "destination": plan.destination,
-            "start_date": plan.start_date.isoformat(),
-            "end_date": plan.end_date.isoformat(),
-            "budget": plan.budget,
-            "preferences": plan.preferences,
-            "itinerary": plan.itinerary,
-            "created_at": plan.created_at.isoformat(),
-            "likes": plan.likes
-        } for plan in plans]), 200
+        try:
+            fields = _requested_fields('public')
+            limit = parse_limit(request.args.get('limit'), app.config['PLANS_PAGE_SIZE'], app.config['PLANS_MAX_PAGE_SIZE'])
+            cursor = request.args.get('cursor')
+            cursor = decode_cursor(cursor, (int, int)) if cursor else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # First pages are answered from the in-memory leaderboard
+        if leaderboard.needs_rebuild():
+            _rebuild_leaderboard()
+        page = leaderboard.page(cursor, limit)
+        if page is not None:
+            plans, next_cursor = page
+            headers = {'X-Next-Cursor': encode_cursor(next_cursor)} if next_cursor else {}
+            return _json_response(dumps([{field: plan[field] for field in fields} for plan in plans]), headers=headers)
+        
+        # Keyset pagination on (likes, id), most liked first
+        query = TravelPlan.query.filter_by(is_public=True).options(
+            load_only(*_plan_columns(fields, 'likes'))
+        )
+        if cursor:
+            query = query.filter(after_cursor((TravelPlan.likes, TravelPlan.id), cursor))
+        plans = query.order_by(TravelPlan.likes.desc(), TravelPlan.id.desc()).limit(limit + 1).all()
+        
+        return _plan_page(plans, limit, fields, lambda plan: (plan.likes, plan.id))
     except Exception as e:
-        app.logger.error(f'Error fetching public plans: {str(e)}')
+        app.logger.error('Error fetching public plans: %s', e)
         return jsonify({"error": "Failed to fetch public plans"}), 500
 
 @app.route('/api/plans/<int:plan_id>/like', methods=['POST'])
 @jwt_required()
 def like_plan(plan_id):
     try:
-        plan = TravelPlan.query.get_or_404(plan_id)
+        plan = TravelPlan.query.options(
+            load_only(TravelPlan.title, TravelPlan.is_public, TravelPlan.likes)
+        ).get_or_404(plan_id)
         
         # Check if the plan is public
         if not plan.is_public:
             return jsonify({"error": "Can only like public plans"}), 403
         
-        plan.likes += 1
-        db.session.commit()
+        if app.config['LIKE_COUNTER_MODE'] == 'buffered':
+            likes = plan.likes + like_counter.add(plan_id)
+        else:
+            TravelPlan.query.filter_by(id=plan_id).update(
+                {TravelPlan.likes: TravelPlan.likes + 1}, synchronize_session=False
+            )
+            db.session.commit()
+            likes = db.session.query(TravelPlan.likes).filter_by(id=plan_id).scalar()
         
-        app.logger.info(f'Plan liked: {plan.title}, new likes: {plan.likes}')
+        if not leaderboard.set_likes(plan_id, likes) and leaderboard.qualifies(likes, plan_id):
+            _sync_leaderboard(db.session.get(TravelPlan, plan_id))
+        
+        app.logger.info('Plan liked: %s, new likes: %s', plan.title, likes, extra={'event': 'like'})
         
         return jsonify({
             "message": "Plan liked successfully",
-            "likes": plan.likes
+            "likes": likes
         }), 200
     except Exception as e:
-        app.logger.error(f'Error liking plan {plan_id}: {str(e)}')
+        app.logger.error('Error liking plan %s: %s', plan_id, e)
         db.session.rollback()
         return jsonify({"error": "Failed to like plan"}), 500
 
 @app.route('/api/favorites', methods=['GET'])
 @jwt_required()
+@use_read_replica
 def get_favorites():
     try:
         current_user_id = get_jwt_identity()
-        favorites = Favorite.query.filter_by(user_id=current_user_id).all()
-        
-        plans = []
-        for fav in favorites:
-            plan = TravelPlan.query.get(fav.plan_id)
-            if plan:
-                plans.append({
-                    "id": plan.id,
-                    "title": plan.title,
-                    "destination": plan.destination,
-                    "start_date": plan.start_date.isoformat(),
-                    "end_date": plan.end_date.isoformat(),
-                    "budget": plan.budget,
-                    "preferences": plan.preferences,
-                    "itinerary": plan.itinerary,
-                    "created_at": plan.created_at.isoformat(),
-                    "is_public": plan.is_public,
-                    "likes": plan.likes
-                })
-        
-        return jsonify(plans), 200
+        
+        try:
+            compact = request.args.get('compact', 'false').lower() == 'true'
+            fields = _requested_fields('summary' if compact else 'detail')
+            limit = parse_limit(request.args.get('limit'), app.config['PLANS_PAGE_SIZE'], app.config['PLANS_MAX_PAGE_SIZE'])
+            cursor = request.args.get('cursor')
+            cursor = decode_cursor(cursor, (datetime, int)) if cursor else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Aggregate validators from a metadata-only query
+        count, favorited_at, updated_at = db.session.query(
+            func.count(Favorite.id), func.max(Favorite.created_at), func.max(TravelPlan.updated_at)
+        ).join(TravelPlan, Favorite.plan_id == TravelPlan.id).filter(Favorite.user_id == current_user_id).one()
+        etag = _etag('favorites', current_user_id, count, favorited_at, updated_at, like_counter.version,
+                     sorted(request.args.items()))
+        validators = _validators(etag)
+        if _not_modified(etag):
+            return Response(status=304, headers=validators)
+        
+        # One joined query, keyset paginated on (favorite.created_at, favorite.id), newest first
+        query = db.session.query(
+            TravelPlan,
+            Favorite.created_at.label('favorited_at'),
+            Favorite.id.label('favorite_id')
+        ).join(Favorite, Favorite.plan_id == TravelPlan.id).filter(
+            Favorite.user_id == current_user_id
+        ).options(load_only(*_plan_columns(fields)))
+        if cursor:
+            query = query.filter(after_cursor((Favorite.created_at, Favorite.id), cursor))
+        rows = query.order_by(Favorite.created_at.desc(), Favorite.id.desc()).limit(limit + 1).all()
+        
+        headers = dict(validators)
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers['X-Next-Cursor'] = encode_cursor((rows[-1].favorited_at, rows[-1].favorite_id))
+        
+        return _json_response(plan_serializer.encode_many([row.TravelPlan for row in rows], fields), headers=headers)
     except Exception as e:
-        app.logger.error(f'Error fetching favorites: {str(e)}')
+        app.logger.error('Error fetching favorites: %s', e)
         return jsonify({"error": "Failed to fetch favorites"}), 500
 
 @app.route('/api/favorites/<int:plan_id>', methods=['POST'])
@@ -455,13 +1049,18 @@ def add_favorite(plan_id):
         
         favorite = Favorite(user_id=current_user_id, plan_id=plan_id)
         db.session.add(favorite)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent request added the same favorite first
+            db.session.rollback()
+            return jsonify({"message": "Plan already in favorites"}), 200
         
-        app.logger.info(f'Plan favorited: {plan.title} by user {current_user_id}')
+        app.logger.info('Plan favorited: %s by user %s', plan.title, current_user_id)
         
         return jsonify({"message": "Plan added to favorites"}), 201
     except Exception as e:
-        app.logger.error(f'Error adding favorite {plan_id}: {str(e)}')
+        app.logger.error('Error adding favorite %s: %s', plan_id, e)
         db.session.rollback()
         return jsonify({"error": "Failed to add favorite"}), 500
 
@@ -475,51 +1074,85 @@ def remove_favorite(plan_id):
         db.session.delete(favorite)
         db.session.commit()
         
-        app.logger.info(f'Favorite removed: plan {plan_id} by user {current_user_id}')
+        app.logger.info('Favorite removed: plan %s by user %s', plan_id, current_user_id)
         
         return jsonify({"message": "Plan removed from favorites"}), 200
     except Exception as e:
-        app.logger.error(f'Error removing favorite {plan_id}: {str(e)}')
+        app.logger.error('Error removing favorite %s: %s', plan_id, e)
         db.session.rollback()
         return jsonify({"error": "Failed to remove favorite"}), 500
 
+def _destination_args():
+    """Read the destination query parameters with their defaults"""
+    return (
+        request.args.get('budget', 'medium'),
+        request.args.get('temperature', 'mild'),
+        request.args.get('purpose', 'leisure'),
+        request.args.get('duration', '7 days')
+    )
+
+def _itinerary_args():
+    """Read the itinerary query parameters with their defaults"""
+    preferences = request.args.get('preferences', '{}')
+    try:
+        preferences = json.loads(preferences)
+    except json.JSONDecodeError:
+        preferences = {}
+    
+    return (
+        request.args.get('destination', 'Paris'),
+        request.args.get('duration', '7 days'),
+        request.args.get('budget', 'medium'),
+        request.args.get('purpose', 'leisure'),
+        request.args.get('travelers', '2'),
+        preferences
+    )
+
+def _sse_response(events, route):
+    """Stream (event, data) pairs to the client as Server-Sent Events"""
+    def generate():
+        try:
+            for event, data in events:
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            app.logger.error('Error streaming %s: %s', route, e)
+            yield f"event: error\ndata: {json.dumps({'error': 'Stream failed'})}\n\n"
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/api/destinations', methods=['GET'])
 def get_destinations():
     try:
-        budget = request.args.get('budget', 'medium')
-        temperature = request.args.get('temperature', 'mild')
-        purpose = request.args.get('purpose', 'leisure')
-        duration = request.args.get('duration', '7 days')
+        budget, temperature, purpose, duration = _destination_args()
         
         destination = generate_destination(budget, temperature, purpose, duration)
         
         return jsonify(destination), 200
     except Exception as e:
-        app.logger.error(f'Error generating destinations: {str(e)}')
+        app.logger.error('Error generating destinations: %s', e)
         return jsonify({"error": "Failed to generate destinations"}), 500
 
+@app.route('/api/destinations/stream', methods=['GET'])
+def stream_destinations():
+    return _sse_response(stream_destination(*_destination_args()), 'destinations')
+
 @app.route('/api/itineraries', methods=['GET'])
 def get_itinerary():
     try:
-        destination = request.args.get('destination', 'Paris')
-        duration = request.args.get('duration', '7 days')
-        budget = request.args.get('budget', 'medium')
-        purpose = request.args.get('purpose', 'leisure')
-        travelers = request.args.get('travelers', '2')
-        preferences = request.args.get('preferences', '{}')
-        
-        try:
-            preferences = json.loads(preferences)
-        except json.JSONDecodeError:
-            preferences = {}
-        
-        itinerary = generate_itinerary(destination, duration, budget, purpose, travelers, preferences)
+        itinerary = generate_itinerary(*_itinerary_args())
         
         return jsonify(itinerary), 200
     except Exception as e:
-        app.logger.error(f'Error generating itinerary: {str(e)}')
+        app.logger.error('Error generating itinerary: %s', e)
         return jsonify({"error": "Failed to generate itinerary"}), 500
 
+@app.route('/api/itineraries/stream', methods=['GET'])
+def stream_itineraries():
+    return _sse_response(stream_itinerary(*_itinerary_args()), 'itineraries')
+
 # Serve static files in production
 @app.route('/')
 def serve_frontend():
@@ -529,7 +1162,43 @@ def serve_frontend():
 def serve_static(path):
     return send_from_directory('frontend/dist', path)
 
-if __name__ == '__main__':
+def migrate_database():
+    """Create the schema or apply pending migrations to it"""
     with app.app_context():
-        db.create_all()
-    app.run(debug=os.getenv('DEBUG', 'True').lower() == 'true', port=5001) 
\ No newline at end of file
+        version = upgrade_schema(db.engine, db.create_all, log=app.logger.info)
+        app.logger.info('Database schema at version %s', version)
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Create the database schema or bring an existing one up to date"""
+    migrate_database()
+
+def resume_plans_at_startup():
+    """Re-queue plans stranded by a previous worker, run once by each server process before it serves
+
+    Only servers call it (gunicorn.conf.py and the dev server below), so CLI commands, scripts and
+    tests that import the app never claim plans or start generation jobs.
+    """
+    with app.app_context():
+        try:
+            if db.inspect(db.engine).has_table('travel_plan'):
+                _resume_abandoned_plans()
+        except Exception as e:
+            app.logger.error('Error resuming plans at startup: %s', e)
+            db.session.rollback()
+
+# Databases created before plan generation went asynchronous lack travel_plan.status, which every
+# plan query selects
+with app.app_context():
+    try:
+        ensure_plan_status(db.engine)
+    except Exception as e:
+        app.logger.error('Error checking plans at startup: %s', e)
+
+if __name__ == '__main__':
+    migrate_database()
+    debug = os.getenv('DEBUG', 'True').lower() == 'true'
+    # The reloader's parent process only watches files, its child serves
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        resume_plans_at_startup()
+    app.run(debug=debug, port=5001) 
\ No newline at end of file
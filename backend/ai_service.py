@@ -1,27 +1,36 @@
 import os
-from openai import OpenAI
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from openai_client import get_openai_client as _shared_openai_client, create_chat_completion  # noqa: E402
+from prompts import compact  # noqa: E402
+
+# Completion token budget of generated travel plans
+MAX_TOKENS = int(os.getenv('LLM_MAX_TOKENS_PLAN', 1000))
 
 def get_openai_client():
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
+    client = _shared_openai_client()
+    if not client:
         raise ValueError("OpenAI API key not found in environment variables")
     
-    # Initialize the client with just the API key
-    return OpenAI(api_key=api_key)
+    # One client and connection pool per process, shared with ai_service.py
+    return client
 
 def generate_travel_plan(prompt):
     client = get_openai_client()
     try:
-        response = client.chat.completions.create(
+        response = create_chat_completion(
+            client,
+            route='plan',
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "You are a helpful travel planning assistant."},
-                {"role": "user", "content": prompt}
+                {"role": "user", "content": compact(prompt)}
             ],
             temperature=0.7,
-            max_tokens=1000
+            max_tokens=MAX_TOKENS
         )
         return response.choices[0].message.content
     except Exception as e:
         print(f"Error generating travel plan: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
@@ -0,0 +1,100 @@
+# benchmarks/catalog_bench.py
+"""Measure destination catalog top-k query latency on a large synthetic catalog.
+
+Run from the repository root:
+    python benchmarks/catalog_bench.py --size 100000 --queries 2000 --k 5
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from itertools import product
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import destination_catalog  # noqa: E402
+from destination_catalog import (  # noqa: E402
+    BUDGET_LEVELS, PURPOSE_ATTRACTIONS, SEASONS, TEMPERATURES, DestinationCatalog
+)
+
+
+def synthetic_catalog(size, seed):
+    """Write `size` random destinations to a temporary JSON file and return its path"""
+    rng = random.Random(seed)
+    attractions = sorted({a for wanted in PURPOSE_ATTRACTIONS.values() for a in wanted})
+    destinations = [{
+        "name": f"Destination {i}",
+        "budget_level": rng.choice(BUDGET_LEVELS),
+        "temperature": rng.choice(TEMPERATURES),
+        "seasons": rng.sample(SEASONS, rng.randint(1, 3)),
+        "attractions": rng.sample(attractions, rng.randint(2, 5)),
+        "avg_daily_cost": rng.randint(30, 400),
+        "customs": "Respect local customs.",
+        "safety": "Generally safe for travelers."
+    } for i in range(size)]
+    fd, path = tempfile.mkstemp(suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(destinations, f)
+    return path
+
+
+def run(catalog, queries, k):
+    """Time top_k over the query list, returning latency percentiles in microseconds"""
+    latencies = []
+    for budget, temperature, purpose, season in queries:
+        start = time.perf_counter()
+        catalog.top_k(budget, temperature, purpose, season, k=k)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "queries": len(latencies),
+        "p50_us": round(latencies[len(latencies) // 2] * 1e6, 1),
+        "p95_us": round(latencies[int(len(latencies) * 0.95)] * 1e6, 1),
+        "p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 1),
+        "max_us": round(latencies[-1] * 1e6, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=100000, help='destinations in the synthetic catalog')
+    parser.add_argument('--queries', type=int, default=2000, help='queries per mode')
+    parser.add_argument('--k', type=int, default=5, help='results per query')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='print one JSON object per line')
+    args = parser.parse_args()
+
+    path = synthetic_catalog(args.size, args.seed)
+    rng = random.Random(args.seed)
+    grid = list(product(
+        [b.title() for b in BUDGET_LEVELS] + ['Luxury'],
+        [t.title() for t in TEMPERATURES],
+        [p.title() for p in PURPOSE_ATTRACTIONS] + [None],
+        list(SEASONS) + [None]
+    ))
+    queries = [rng.choice(grid) for _ in range(args.queries)]
+
+    modes = [('numpy', destination_catalog.np)] if destination_catalog.np is not None else []
+    modes.append(('python', None))
+    try:
+        for mode, np_module in modes:
+            destination_catalog.np = np_module
+            catalog = DestinationCatalog(path)
+            start = time.perf_counter()
+            catalog.load()
+            load_ms = round((time.perf_counter() - start) * 1e3, 1)
+            result = dict(mode=mode, size=len(catalog), k=args.k, load_ms=load_ms, **run(catalog, queries, args.k))
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(f"{mode:>6}  load {load_ms} ms  p50 {result['p50_us']} us  p95 {result['p95_us']} us  "
+                      f"p99 {result['p99_us']} us  max {result['max_us']} us")
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
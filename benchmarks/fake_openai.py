@@ -0,0 +1,152 @@
+# benchmarks/fake_openai.py
+"""Local stand-in for the OpenAI chat completions API with latency and error injection.
+
+Run on its own:
+    python benchmarks/fake_openai.py --port 8900 --latency 0.8 --jitter 0.3 --error-rate 0.05
+and point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8900/v1.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _destination():
+    return {
+        "destination": "Lisbon, Portugal",
+        "explanation": "Mild weather, moderate prices and plenty to see.",
+        "best_time": "Spring or Fall",
+        "customs": "Standard European customs apply.",
+        "safety": "Generally safe for travelers."
+    }
+
+
+def _itinerary(prompt):
+    match = re.search(r'Duration: (\d+)', prompt)
+    days = min(int(match.group(1)) if match else 7, 30)
+    return {
+        "days": [{
+            "day": day + 1,
+            "morning": "Breakfast, then a walking tour of the old town",
+            "afternoon": "Lunch at a market hall, then a museum visit",
+            "evening": "Dinner with live music"
+        } for day in range(days)],
+        "costs": {"Accommodation": "$100-150 per night", "Food": "$40 per day"},
+        "transportation": "Metro and trams",
+        "food": "Seafood and pastries",
+        "cultural_experiences": ["Fado evening"],
+        "photo_spots": ["Miradouro da Senhora do Monte"],
+        "alternatives": ["Aquarium on rainy days"],
+        "packing_list": ["Comfortable shoes"],
+        "health_safety": ["Watch for pickpockets on trams"]
+    }
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        config = self.server.config
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        with self.server.lock:
+            self.server.requests += 1
+
+        time.sleep(max(0.0, random.gauss(config.latency, config.jitter)))
+
+        if random.random() < config.error_rate:
+            status = random.choice((429, 500, 503))
+            return self._send_json(status, {"error": {"message": "Injected failure", "type": "server_error"}})
+
+        prompt = body.get('messages', [{}])[-1].get('content', '')
+        content = _itinerary(prompt) if 'itinerary' in prompt.lower() else _destination()
+        content = json.dumps(content)
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if body.get('stream'):
+            return self._send_stream(body.get('model', 'gpt-3.5-turbo'), content)
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get('model', 'gpt-3.5-turbo'),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        })
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, model, content):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        pieces = [content[i:i + 40] for i in range(0, len(content), 40)]
+        for piece in pieces:
+            self._write_chunk(completion_id, model, {"content": piece}, None)
+        self._write_chunk(completion_id, model, {}, "stop")
+        self._write_raw(b'data: [DONE]\n\n')
+        self._write_raw(b'')
+
+    def _write_chunk(self, completion_id, model, delta, finish_reason):
+        event = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+        self._write_raw(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+
+    def _write_raw(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+
+
+def start_server(host='127.0.0.1', port=0, latency=0.5, jitter=0.1, error_rate=0.0):
+    """Start the fake server on a background thread and return it; server.server_port has the port"""
+    server = ThreadingHTTPServer((host, port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.config = argparse.Namespace(latency=latency, jitter=jitter, error_rate=error_rate)
+    server.lock = threading.Lock()
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, name='fake-openai', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency', type=float, default=0.5, help='mean response time in seconds')
+    parser.add_argument('--jitter', type=float, default=0.1, help='standard deviation of the response time')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with 429/5xx')
+    args = parser.parse_args()
+
+    server = start_server(args.host, args.port, args.latency, args.jitter, args.error_rate)
+    print(f"Fake OpenAI listening on http://{args.host}:{server.server_port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
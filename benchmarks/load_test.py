@@ -0,0 +1,387 @@
+# benchmarks/load_test.py
+"""End-to-end HTTP load test of the API against a local fake OpenAI server.
+
+Starts the fake OpenAI server, launches the app under gunicorn and/or the Flask dev
+server with a throwaway SQLite database, drives a weighted mix of API traffic from
+concurrent virtual users and reports per-route p50/p95/p99 latency and RPS as JSON.
+
+Run from the repository root:
+    python benchmarks/load_test.py --server both --users 16 --seconds 30 --output before.json
+    python benchmarks/load_test.py --mix login=0,create_plan=1,like=4 --openai-error-rate 0.1
+"""
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_openai import start_server  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = (
+    'login=10,create_plan=5,list_plans=20,get_plan=10,public_plans=20,'
+    'like=20,favorite=5,list_favorites=10'
+)
+
+BUDGETS = ('Low', 'Medium', 'High', 'Luxury')
+TEMPERATURES = ('Cold', 'Mild', 'Warm', 'Hot')
+PURPOSES = ('Leisure', 'Adventure', 'Cultural', 'Business')
+DURATIONS = ('3 days', '5 days', '7 days', '10 days', '14 days')
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))]
+
+
+def _parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in ACTIONS:
+            raise argparse.ArgumentTypeError(f"unknown action {name!r}, choose from {', '.join(ACTIONS)}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError('the traffic mix needs at least one positive weight')
+    return mix
+
+
+class Recorder:
+    """Collects (route, status, latency) samples from every virtual user"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(list)
+        self._statuses = defaultdict(lambda: defaultdict(int))
+        self.recording = False
+
+    def record(self, route, status, latency):
+        if not self.recording:
+            return
+        with self._lock:
+            self._samples[route].append(latency)
+            self._statuses[route][str(status)] += 1
+
+    def report(self, elapsed):
+        routes = {}
+        with self._lock:
+            for route in sorted(self._samples):
+                latencies = sorted(self._samples[route])
+                statuses = dict(sorted(self._statuses[route].items()))
+                errors = sum(count for status, count in statuses.items() if status == 'error' or int(status) >= 500)
+                routes[route] = {
+                    "requests": len(latencies),
+                    "errors": errors,
+                    "status": statuses,
+                    "rps": round(len(latencies) / elapsed, 2),
+                    "p50_ms": round(_percentile(latencies, 0.50) * 1e3, 2),
+                    "p95_ms": round(_percentile(latencies, 0.95) * 1e3, 2),
+                    "p99_ms": round(_percentile(latencies, 0.99) * 1e3, 2),
+                    "max_ms": round(latencies[-1] * 1e3, 2)
+                }
+            latencies = sorted(latency for samples in self._samples.values() for latency in samples)
+        total = {
+            "requests": len(latencies),
+            "errors": sum(route["errors"] for route in routes.values()),
+            "rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(_percentile(latencies, 0.50) * 1e3, 2) if latencies else None,
+            "p95_ms": round(_percentile(latencies, 0.95) * 1e3, 2) if latencies else None,
+            "p99_ms": round(_percentile(latencies, 0.99) * 1e3, 2) if latencies else None
+        }
+        return total, routes
+
+
+class SharedPlans:
+    """Public plan ids created during the run, the targets of like and favorite traffic"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = []
+
+    def add(self, plan_id):
+        with self._lock:
+            self._ids.append(plan_id)
+
+    def pick(self):
+        with self._lock:
+            return random.choice(self._ids) if self._ids else None
+
+
+class VirtualUser:
+    """One API client with its own account, session and plans"""
+
+    def __init__(self, base_url, index, recorder, shared, timeout):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.shared = shared
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.email = f"load-{index}-{random.getrandbits(32):08x}@example.com"
+        self.password = 'load-test-password'
+        self.plan_ids = []
+
+    def request(self, route, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            self.recorder.record(route, 'error', time.perf_counter() - start)
+            return None
+        self.recorder.record(route, response.status_code, time.perf_counter() - start)
+        return response
+
+    def _authenticate(self, response):
+        if response is not None and response.ok:
+            self.session.headers['Authorization'] = f"Bearer {response.json()['token']}"
+            return True
+        return False
+
+    def signup(self):
+        response = self.request('signup', 'POST', '/api/auth/signup', json={
+            'email': self.email, 'password': self.password, 'full_name': 'Load Test'
+        })
+        return self._authenticate(response)
+
+    def login(self):
+        response = self.request('login', 'POST', '/api/auth/login', json={
+            'email': self.email, 'password': self.password
+        })
+        self._authenticate(response)
+
+    def create_plan(self, is_public=None):
+        duration = random.choice(DURATIONS)
+        preferences = {
+            'budget': random.choice(BUDGETS),
+            'temperature': random.choice(TEMPERATURES),
+            'purpose': random.choice(PURPOSES),
+            'duration': duration,
+            'travelers': random.randint(1, 4)
+        }
+        days = int(duration.split()[0])
+        is_public = random.random() < 0.5 if is_public is None else is_public
+        response = self.request('create_plan', 'POST', '/api/plans', json={
+            'title': f"Trip {random.getrandbits(24):06x}",
+            'destination': 'Anywhere',
+            'start_date': '2030-05-01T00:00:00',
+            'end_date': f"2030-05-{1 + days:02d}T00:00:00",
+            'budget': random.randint(500, 5000),
+            'preferences': preferences,
+            'is_public': is_public
+        })
+        if response is not None and response.status_code == 201:
+            plan_id = response.json()['plan']['id']
+            self.plan_ids.append(plan_id)
+            if is_public:
+                self.shared.add(plan_id)
+
+    def list_plans(self):
+        self.request('list_plans', 'GET', '/api/plans', params={'limit': 20})
+
+    def get_plan(self):
+        if not self.plan_ids:
+            return self.create_plan()
+        self.request('get_plan', 'GET', f"/api/plans/{random.choice(self.plan_ids)}")
+
+    def public_plans(self):
+        self.request('public_plans', 'GET', '/api/plans/public', params={'limit': 20})
+
+    def like(self):
+        plan_id = self.shared.pick()
+        if plan_id is not None:
+            self.request('like', 'POST', f"/api/plans/{plan_id}/like")
+
+    def favorite(self):
+        plan_id = self.shared.pick()
+        if plan_id is not None:
+            self.request('favorite', 'POST', f"/api/favorites/{plan_id}")
+
+    def list_favorites(self):
+        self.request('list_favorites', 'GET', '/api/favorites', params={'limit': 20, 'compact': 'true'})
+
+
+ACTIONS = (
+    'login', 'create_plan', 'list_plans', 'get_plan', 'public_plans', 'like', 'favorite', 'list_favorites'
+)
+
+
+def _launch(kind, port, env, workdir, args):
+    """Start the app under gunicorn or the Flask dev server and wait until /api/health answers"""
+    if kind == 'gunicorn':
+        command = [
+            sys.executable, '-m', 'gunicorn', '--config', os.path.join(ROOT, 'gunicorn.conf.py'),
+            '--workers', str(args.workers), '--threads', str(args.threads),
+            '--bind', f"127.0.0.1:{port}", '--timeout', '120', '--log-level', 'warning',
+            'app:app'
+        ]
+    else:
+        command = [
+            sys.executable, '-c',
+            f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True, debug=False)"
+        ]
+    log = open(os.path.join(workdir, f"{kind}.log"), 'w')
+    process = subprocess.Popen(command, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{kind} exited with {process.returncode}, see {log.name}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/api/health", timeout=1).ok:
+                return process, log
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{kind} did not become healthy within {args.startup_timeout}s, see {log.name}")
+
+
+def run(kind, fake, args):
+    """Load test one server kind and return its report"""
+    workdir = tempfile.mkdtemp(prefix=f"load-{kind}-")
+    port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': 'sqlite:///' + os.path.join(workdir, 'load_test.db'),
+        'OPENAI_API_KEY': 'sk-load-test',
+        'OPENAI_BASE_URL': f"http://127.0.0.1:{fake.server_port}/v1",
+        'DESTINATION_TABLE_PATH': os.path.join(workdir, 'destination_table.json'),
+        'DESTINATION_TABLE_REFRESH': '0',
+        'DEBUG': 'False',
+        'PYTHONPATH': os.pathsep.join(filter(None, (ROOT, env.get('PYTHONPATH'))))
+    })
+    if args.no_llm_cache:
+        env['LLM_CACHE_MAX_ENTRIES'] = '0'
+
+    subprocess.run(
+        [sys.executable, '-c', 'from app import app, db\nwith app.app_context(): db.create_all()'],
+        cwd=workdir, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    process, log = _launch(kind, port, env, workdir, args)
+    openai_before = fake.requests
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        recorder = Recorder()
+        shared = SharedPlans()
+        users = [VirtualUser(base_url, index, recorder, shared, args.timeout) for index in range(args.users)]
+
+        # Accounts and a pool of public plans to like and favorite, not part of the measurements
+        for user in users:
+            if not user.signup():
+                raise RuntimeError(f"signup failed against {kind}, see {log.name}")
+        for user in users[:max(1, args.seed_plans)]:
+            user.create_plan(is_public=True)
+
+        actions = [name for name, weight in args.mix.items() if weight > 0]
+        weights = [args.mix[name] for name in actions]
+        stop = threading.Event()
+
+        def drive(user):
+            while not stop.is_set():
+                getattr(user, random.choices(actions, weights)[0])()
+
+        threads = [threading.Thread(target=drive, args=(user,), daemon=True) for user in users]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.warmup)
+        recorder.recording = True
+        started = time.perf_counter()
+        time.sleep(args.seconds)
+        recorder.recording = False
+        elapsed = time.perf_counter() - started
+        stop.set()
+        for thread in threads:
+            thread.join(args.timeout)
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        log.close()
+
+    total, routes = recorder.report(elapsed)
+    if not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "server": kind,
+        "workers": args.workers if kind == 'gunicorn' else 1,
+        "threads": args.threads if kind == 'gunicorn' else None,
+        "duration_s": round(elapsed, 2),
+        "openai_requests": fake.requests - openai_before,
+        "total": total,
+        "routes": routes
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--server', choices=('gunicorn', 'dev', 'both'), default='gunicorn')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gunicorn worker')
+    parser.add_argument('--users', type=int, default=16, help='concurrent virtual users')
+    parser.add_argument('--seconds', type=float, default=30, help='measured duration per server')
+    parser.add_argument('--warmup', type=float, default=3, help='unmeasured traffic before recording starts')
+    parser.add_argument('--mix', type=_parse_mix, default=_parse_mix(DEFAULT_MIX),
+                        help=f"weighted traffic mix as action=weight pairs (default {DEFAULT_MIX})")
+    parser.add_argument('--seed-plans', type=int, default=8, help='public plans created before measuring')
+    parser.add_argument('--openai-latency', type=float, default=0.5, help='mean fake OpenAI response time in seconds')
+    parser.add_argument('--openai-jitter', type=float, default=0.1, help='standard deviation of the fake response time')
+    parser.add_argument('--openai-error-rate', type=float, default=0.0, help='share of fake OpenAI calls that fail')
+    parser.add_argument('--no-llm-cache', action='store_true', help='disable the LLM response cache in the app')
+    parser.add_argument('--timeout', type=float, default=60, help='client request timeout in seconds')
+    parser.add_argument('--startup-timeout', type=float, default=30, help='seconds to wait for the server to start')
+    parser.add_argument('--seed', type=int, default=None, help='random seed for a repeatable traffic mix')
+    parser.add_argument('--keep', action='store_true', help='keep the temporary database and server logs')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    fake = start_server(latency=args.openai_latency, jitter=args.openai_jitter, error_rate=args.openai_error_rate)
+
+    kinds = ('gunicorn', 'dev') if args.server == 'both' else (args.server,)
+    report = {
+        "settings": {
+            "users": args.users,
+            "seconds": args.seconds,
+            "mix": args.mix,
+            "openai_latency": args.openai_latency,
+            "openai_jitter": args.openai_jitter,
+            "openai_error_rate": args.openai_error_rate,
+            "llm_cache": not args.no_llm_cache
+        },
+        "runs": [run(kind, fake, args) for kind in kinds]
+    }
+    fake.shutdown()
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
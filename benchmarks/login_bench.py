@@ -0,0 +1,102 @@
+# benchmarks/login_bench.py
+"""Measure login requests per second at different scrypt cost settings.
+
+Run from the repository root:
+    python benchmarks/login_bench.py --costs 4096,16384,32768 --threads 8 --seconds 5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'login_bench.db')
+
+import app as travelplanner  # noqa: E402
+from passwords import PasswordHasher  # noqa: E402
+
+
+def run(cost, args):
+    """Drive /api/auth/login from several threads and return throughput and latency figures"""
+    travelplanner.password_hasher = PasswordHasher(
+        n=cost, r=args.r, p=args.p, max_workers=args.workers, max_pending=args.threads * 2
+    )
+    email = f"bench-{cost}@example.com"
+    client = travelplanner.app.test_client()
+    response = client.post('/api/auth/signup', json={'email': email, 'password': 'bench-password', 'full_name': 'Bench'})
+    if response.status_code != 201:
+        raise SystemExit(f"Signup failed with {response.status_code}: {response.get_data(as_text=True)[:200]}")
+
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def worker():
+        local_client = travelplanner.app.test_client()
+        local_latencies = []
+        while time.perf_counter() < deadline and not failures:
+            start = time.perf_counter()
+            response = local_client.post('/api/auth/login', json={'email': email, 'password': 'bench-password'})
+            local_latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                # A throughput figure that includes failed logins means nothing, stop every thread
+                with lock:
+                    failures.append(f"{response.status_code}: {response.get_data(as_text=True)[:200]}")
+                break
+        with lock:
+            latencies.extend(local_latencies)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if failures:
+        raise SystemExit(f"Login failed at N={cost} with {failures[0]}")
+
+    latencies.sort()
+    return {
+        "scrypt_n": cost,
+        "scrypt_r": args.r,
+        "scrypt_p": args.p,
+        "hash_workers": args.workers,
+        "threads": args.threads,
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1e3, 1) if latencies else None,
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1e3, 1) if latencies else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--costs', default='4096,16384,32768', help='comma separated scrypt N values')
+    parser.add_argument('--r', type=int, default=8, help='scrypt block size')
+    parser.add_argument('--p', type=int, default=1, help='scrypt parallelism')
+    parser.add_argument('--workers', type=int, default=2, help='password hashing threads')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--seconds', type=float, default=5, help='duration per cost setting')
+    parser.add_argument('--json', action='store_true', help='print one JSON object per line')
+    args = parser.parse_args()
+
+    with travelplanner.app.app_context():
+        travelplanner.db.create_all()
+    travelplanner.app.logger.disabled = True
+
+    for cost in (int(value) for value in args.costs.split(',')):
+        result = run(cost, args)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(f"N={result['scrypt_n']:>6}  {result['rps']:8.1f} req/s  p50 {result['p50_ms']} ms  "
+                  f"p95 {result['p95_ms']} ms")
+
+
+if __name__ == '__main__':
+    main()
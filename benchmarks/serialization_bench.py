@@ -0,0 +1,94 @@
+# benchmarks/serialization_bench.py
+"""Compare the plan serializer with the previous hand-built dict + jsonify path.
+
+Run from the repository root:
+    python benchmarks/serialization_bench.py --plans 50 --days 14
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+from types import SimpleNamespace
+
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from serializers import PlanSerializer, orjson  # noqa: E402
+
+
+def make_plans(count, days):
+    now = datetime.utcnow()
+    plans = []
+    for i in range(count):
+        itinerary = {
+            "destination": {"destination": "Portugal", "explanation": "Moderate costs with mild weather."},
+            "itinerary": {
+                "days": [{
+                    "day": d + 1,
+                    "morning": f"Breakfast at hotel, then visit Lisbon city center ({d})",
+                    "afternoon": "Lunch at a local restaurant, then explore Lisbon attractions",
+                    "evening": "Dinner at a recommended restaurant, then evening entertainment"
+                } for d in range(days)],
+                "costs": {"Accommodation": "$100-200 per night", "Food": "$30-50 per day"},
+                "photo_spots": ["City center of Lisbon", "Local landmarks in Lisbon"]
+            }
+        }
+        plans.append(SimpleNamespace(
+            id=i + 1, title=f"Plan {i}", destination="Lisbon", start_date=now, end_date=now,
+            budget=1500.0, preferences={"budget": "Medium", "temperature": "Mild", "duration": f"{days} days"},
+            itinerary=itinerary, created_at=now, updated_at=now, is_public=True, likes=i, status='ready'
+        ))
+    return plans
+
+
+def legacy(plans):
+    """The dict literal previously copied into every route"""
+    return jsonify([{
+        "id": plan.id,
+        "title": plan.title,
+        "destination": plan.destination,
+        "start_date": plan.start_date.isoformat(),
+        "end_date": plan.end_date.isoformat(),
+        "budget": plan.budget,
+        "preferences": plan.preferences,
+        "itinerary": plan.itinerary,
+        "created_at": plan.created_at.isoformat(),
+        "updated_at": plan.updated_at.isoformat(),
+        "is_public": plan.is_public,
+        "likes": plan.likes,
+        "status": plan.status
+    } for plan in plans]).get_data()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plans', type=int, default=50, help='plans per response')
+    parser.add_argument('--days', type=int, default=14, help='itinerary days per plan')
+    parser.add_argument('--repeat', type=int, default=200, help='responses encoded per measurement')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    plans = make_plans(args.plans, args.days)
+    fields = PlanSerializer.FIELDS
+    cold = PlanSerializer(cache_size=0)
+    warm = PlanSerializer(cache_size=args.plans)
+    warm.encode_many(plans, fields)
+
+    cases = [
+        ('jsonify (previous)', lambda: legacy(plans)),
+        ('serializer, no itinerary cache', lambda: cold.encode_many(plans, fields)),
+        ('serializer, cached itineraries', lambda: warm.encode_many(plans, fields)),
+    ]
+    print(f"encoder: {'orjson' if orjson else 'json'}, {args.plans} plans x {args.days} days, "
+          f"response {len(warm.encode_many(plans, fields))} bytes")
+    with app.app_context():
+        baseline = None
+        for name, fn in cases:
+            seconds = min(timeit.repeat(fn, number=args.repeat, repeat=3)) / args.repeat
+            baseline = baseline or seconds
+            print(f"{name:32} {seconds * 1e3:8.3f} ms/response  {baseline / seconds:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# circuit_breaker.py
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Trips when the recent error or slow-call rate of a dependency gets too high
+
+    Outcomes are kept for the last `window` seconds. Once at least `min_calls` were
+    recorded and the share of failures (errors and calls slower than `slow_call`) reaches
+    `failure_rate`, the circuit opens for `open_duration` seconds. After that up to
+    `half_open_probes` calls are let through; one success closes the circuit again and
+    one failure reopens it.
+    """
+
+    def __init__(self, failure_rate=0.5, min_calls=10, window=30, slow_call=10, open_duration=30, half_open_probes=1):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.slow_call = slow_call
+        self.open_duration = open_duration
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self._outcomes = deque()  # (timestamp, failed)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.trips = 0
+
+    def allow(self):
+        """Whether a call may go ahead; counts the call as a probe while half-open"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_duration:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self.rejected += 1
+                    return False
+                self._probes += 1
+            return True
+
+    def cancel(self):
+        """Give back a half-open probe that was allowed but never made"""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self, duration):
+        if duration >= self.slow_call:
+            self.record_failure(duration)
+            return
+        with self._lock:
+            if self.state == OPEN:
+                # A call that was already in flight when the circuit opened
+                return
+            if self.state == HALF_OPEN:
+                self._close()
+                return
+            self._record(False)
+
+    def record_failure(self, duration=0.0):
+        with self._lock:
+            if self.state == OPEN:
+                # Stragglers from before the trip must not reopen it, which would move the open window and recount the trip
+                return
+            if self.state == HALF_OPEN:
+                self._open()
+                return
+            self._record(True)
+            if len(self._outcomes) >= self.min_calls and self._failures / len(self._outcomes) >= self.failure_rate:
+                self._open()
+
+    def _record(self, failed):
+        now = time.monotonic()
+        self._outcomes.append((now, failed))
+        self._failures += failed
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            _, old_failed = self._outcomes.popleft()
+            self._failures -= old_failed
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self.trips += 1
+
+    def _close(self):
+        self.state = CLOSED
+        self._outcomes.clear()
+        self._failures = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "recent_calls": len(self._outcomes),
+                "recent_failures": self._failures,
+                "rejected": self.rejected,
+                "trips": self.trips
+            }
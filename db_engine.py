@@ -0,0 +1,72 @@
+# db_engine.py
+from functools import wraps
+
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Bind key of the optional read replica in SQLALCHEMY_BINDS
+REPLICA_BIND = 'replica'
+
+
+def engine_options(uri, pool_size=10, max_overflow=20, pool_recycle=1800, pool_timeout=30, pool_pre_ping=True):
+    """Engine options for a database URL: sized, health-checked pools for server databases, defaults for SQLite"""
+    if make_url(uri).get_backend_name() == 'sqlite':
+        # One file, no network: SQLite keeps SQLAlchemy's default pool and is tuned through pragmas instead
+        return {}
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_recycle": pool_recycle,
+        "pool_timeout": pool_timeout,
+        "pool_pre_ping": pool_pre_ping
+    }
+
+
+def sqlite_pragmas(busy_timeout_ms=5000, synchronous='NORMAL', mmap_size=64 * 1024 * 1024):
+    """WAL lets readers run alongside the single writer, and the busy timeout makes writers wait instead of failing"""
+    return {
+        "journal_mode": "WAL",
+        "synchronous": synchronous,
+        "busy_timeout": int(busy_timeout_ms),
+        "mmap_size": int(mmap_size)
+    }
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Run the pragmas on every new connection of a SQLite engine; other engines are left alone"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def use_read_replica(view):
+    """Let a read-only view query the read replica, when one is configured
+
+    Replicas can lag behind the primary, so only use it for views that tolerate slightly stale data.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class RoutingSession(Session):
+    """Session that sends the queries of use_read_replica views to the replica, and everything else to the primary"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context() and g.get('read_replica'):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
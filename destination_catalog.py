@@ -0,0 +1,221 @@
+# destination_catalog.py
+import heapq
+import json
+import os
+import sqlite3
+
+try:
+    import numpy as np
+except ImportError:  # scoring falls back to plain Python lists
+    np = None
+
+BUDGET_LEVELS = ('low', 'medium', 'high')
+TEMPERATURES = ('cold', 'mild', 'hot')
+SEASONS = ('spring', 'summer', 'fall', 'winter')
+
+# Attractions that make a destination a good fit for each travel purpose
+PURPOSE_ATTRACTIONS = {
+    'leisure': ('beaches', 'food', 'shopping', 'nightlife', 'relaxation', 'wine'),
+    'adventure': ('hiking', 'diving', 'skiing', 'wildlife', 'nature', 'surfing', 'adventure sports'),
+    'cultural': ('museums', 'architecture', 'history', 'temples', 'festivals', 'art', 'castles', 'markets'),
+    'business': ('conventions', 'finance', 'technology', 'connectivity'),
+    'relaxation': ('beaches', 'spa', 'relaxation', 'wine', 'nature'),
+}
+
+# How much each preference counts towards a destination's score
+BUDGET_WEIGHT = 4.0
+TEMPERATURE_WEIGHT = 3.0
+PURPOSE_WEIGHT = 2.0
+SEASON_WEIGHT = 1.0
+
+# Attractions a destination needs for a full purpose score
+PURPOSE_MATCHES = 2
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+
+def _code(levels, value):
+    """Position of value in levels, or None if it is not one of them"""
+    value = str(value or '').strip().lower()
+    return levels.index(value) if value in levels else None
+
+
+def _similarity(levels, weight):
+    """weight * closeness of every pair of levels, 1 for equal and 0 for opposite ends"""
+    steps = len(levels) - 1
+    return [[weight * (1 - abs(a - b) / steps) for b in range(len(levels))] for a in range(len(levels))]
+
+
+_BUDGET_SIMILARITY = _similarity(BUDGET_LEVELS, BUDGET_WEIGHT)
+_TEMPERATURE_SIMILARITY = _similarity(TEMPERATURES, TEMPERATURE_WEIGHT)
+
+
+class DestinationCatalog:
+    """Destinations loaded from a JSON file or SQLite table, indexed for top-k matching on user preferences
+
+    Every preference is categorical. Destinations are bucketed by (budget_level, temperature),
+    so within a bucket budget and temperature add the same amount to every score, and the
+    purpose and season parts come from per-purpose attraction and per-season score vectors
+    built at load time. A query visits buckets from the closest match outwards, scores each
+    one in a single vectorized pass (NumPy when installed, plain lists otherwise) and stops
+    as soon as no remaining bucket can beat the current top k.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.destinations = []
+        self._order = []
+        self._buckets = {}
+        self._purpose_scores = {}
+        self._season_scores = {}
+        self._extra_scores = {}
+
+    def __len__(self):
+        return len(self.destinations)
+
+    def load(self):
+        """(Re)build the catalog and its indexes from self.path"""
+        try:
+            destinations = self._read()
+        except FileNotFoundError:
+            print(f"Destination catalog not found: {self.path}")
+            return
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"Error loading destination catalog: {str(e)}")
+            return
+        self._index(destinations)
+
+    def _read(self):
+        if self.path.endswith(SQLITE_SUFFIXES):
+            if not os.path.exists(self.path):
+                raise FileNotFoundError(self.path)
+            with sqlite3.connect(self.path) as conn:
+                rows = conn.execute(
+                    'SELECT name, budget_level, temperature, seasons, attractions, avg_daily_cost, customs, safety '
+                    'FROM destinations ORDER BY id'
+                ).fetchall()
+            return [{
+                "name": name,
+                "budget_level": budget_level,
+                "temperature": temperature,
+                "seasons": [s.strip() for s in (seasons or '').split(',') if s.strip()],
+                "attractions": [a.strip() for a in (attractions or '').split(',') if a.strip()],
+                "avg_daily_cost": avg_daily_cost,
+                "customs": customs,
+                "safety": safety
+            } for name, budget_level, temperature, seasons, attractions, avg_daily_cost, customs, safety in rows]
+        with open(self.path) as f:
+            return json.load(f)
+
+    def _index(self, destinations):
+        keys = [
+            (_code(BUDGET_LEVELS, d.get('budget_level')), _code(TEMPERATURES, d.get('temperature'))) for d in destinations
+        ]
+        # Score vectors are laid out bucket by bucket, so each bucket is one contiguous slice
+        order = sorted(range(len(destinations)), key=lambda i: (tuple(-1 if c is None else c for c in keys[i]), i))
+        buckets = {}
+        for position, i in enumerate(order):
+            start, _ = buckets.get(keys[i], (position, position))
+            buckets[keys[i]] = (start, position + 1)
+
+        attractions = [{a.lower() for a in destinations[i].get('attractions', ())} for i in order]
+        seasons = [{s.lower() for s in destinations[i].get('seasons', ())} for i in order]
+        purpose_scores = {
+            purpose: [PURPOSE_WEIGHT * min(1.0, len(found & set(wanted)) / PURPOSE_MATCHES) for found in attractions]
+            for purpose, wanted in PURPOSE_ATTRACTIONS.items()
+        }
+        season_scores = {
+            season: [SEASON_WEIGHT if season in found else 0.0 for found in seasons]
+            for season in SEASONS
+        }
+
+        if np is not None:
+            order = np.array(order, dtype=np.int64)
+            purpose_scores = {k: np.array(v, dtype=np.float64) for k, v in purpose_scores.items()}
+            season_scores = {k: np.array(v, dtype=np.float64) for k, v in season_scores.items()}
+
+        # Swap everything in at once so concurrent queries never see a half-built index
+        (self.destinations, self._order, self._buckets, self._purpose_scores, self._season_scores,
+         self._extra_scores) = (destinations, order, buckets, purpose_scores, season_scores, {})
+
+    def _extra(self, purpose, season):
+        """Combined purpose and season score vector and its maximum, or (None, 0.0) when neither applies"""
+        key = (purpose, season)
+        if key not in self._extra_scores:
+            vectors = [v for v in (self._purpose_scores.get(purpose), self._season_scores.get(season)) if v is not None]
+            if not vectors:
+                self._extra_scores[key] = (None, 0.0)
+            elif np is not None:
+                extra = sum(vectors[1:], vectors[0].copy())
+                self._extra_scores[key] = (extra, float(extra.max()))
+            else:
+                extra = [sum(values) for values in zip(*vectors)]
+                self._extra_scores[key] = (extra, max(extra))
+        return self._extra_scores[key]
+
+    def top_k(self, budget, temperature, purpose=None, season=None, k=5):
+        """The k best matching destinations as (score, destination) pairs, best first"""
+        buckets = self._buckets
+        if not buckets or k <= 0:
+            return []
+        budget = _code(BUDGET_LEVELS, budget)
+        temperature = _code(TEMPERATURES, temperature)
+        extra, best_extra = self._extra(str(purpose or '').strip().lower(), str(season or '').strip().lower())
+
+        def base(key):
+            return (
+                (_BUDGET_SIMILARITY[budget][key[0]] if budget is not None and key[0] is not None else 0.0)
+                + (_TEMPERATURE_SIMILARITY[temperature][key[1]] if temperature is not None and key[1] is not None else 0.0)
+            )
+
+        top = []
+        for score, key in sorted(((base(key), key) for key in buckets), key=lambda item: -item[0]):
+            # Equal scores go to the earlier catalog entry, so only a strictly lower bound ends the scan
+            if len(top) == k and score + best_extra < top[-1][0]:
+                break
+            top = sorted(top + self._select(*buckets[key], score, extra, k), key=lambda item: (-item[0], item[1]))[:k]
+        return [(score, self.destinations[i]) for score, i in top]
+
+    def _select(self, start, end, base, extra, k):
+        """(score, catalog index) for the k best destinations of one bucket, ties going to the earlier catalog entry"""
+        ids = self._order[start:end]
+        if extra is None:
+            return [(base, int(i)) for i in ids[:k]]
+        if np is not None:
+            scores = extra[start:end]
+            best = scores.max()
+            positions = np.flatnonzero(scores == best)[:k]
+            if len(positions) < k and len(scores) > k:
+                # Everything above the k-th score plus the earliest entries tied with it
+                kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+                above = np.flatnonzero(scores > kth)
+                tied = np.flatnonzero(scores == kth)[:k - len(above)]
+                positions = np.concatenate((above, tied))
+            elif len(positions) < k:
+                positions = np.arange(len(scores))
+            return [(base + float(scores[p]), int(ids[p])) for p in positions]
+        return heapq.nsmallest(
+            k, ((base + extra[p], i) for p, i in enumerate(ids, start)), key=lambda item: (-item[0], item[1])
+        )
+
+    def recommend(self, budget, temperature, purpose=None, season=None):
+        """The best matching destination in the shape of a generated recommendation, or None if the catalog is empty"""
+        matches = self.top_k(budget, temperature, purpose, season, k=1)
+        if not matches:
+            return None
+        destination = matches[0][1]
+        attractions = destination.get('attractions', [])
+        seasons = destination.get('seasons', [])
+        return {
+            "destination": destination['name'],
+            "explanation": (
+                f"{destination['name']} suits a {str(budget).strip().lower()} budget and "
+                f"{str(temperature).strip().lower()} weather"
+                + (f", known for {', '.join(attractions[:3])}." if attractions else ".")
+            ),
+            "attractions": attractions,
+            "daily_budget": f"${destination['avg_daily_cost']} per person",
+            "best_time": ' or '.join(s.title() for s in seasons[:2]) or "Year-round",
+            "customs": destination.get('customs', "Respect local customs."),
+            "safety": destination.get('safety', "Check current travel advisories.")
+        }
@@ -0,0 +1,161 @@
+# destination_table.py
+import json
+import os
+import threading
+import time
+from itertools import product
+
+# The full input grid of generate_destination
+BUDGETS = ('Low', 'Medium', 'High')
+TEMPERATURES = ('Hot', 'Mild', 'Cold')
+PURPOSES = ('Leisure', 'Adventure', 'Cultural', 'Business', 'Relaxation')
+DURATIONS = ('3 days', '5 days', '7 days', '10 days', '14 days')
+
+# How often a process waiting on another one's refresh checks for the new file
+LOCK_POLL_INTERVAL = 30
+
+
+class DestinationTable:
+    """Precomputed destination recommendations for every combination of the input grid, persisted to disk
+
+    Every process (e.g. each gunicorn worker) runs its own refresh thread, but an O_EXCL lock file
+    next to the table lets only one of them regenerate it; the others reload the file it writes.
+    """
+
+    def __init__(self, path, generate, refresh_interval=86400, lock_timeout=3600):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.refresh_interval = refresh_interval
+        self.lock_timeout = lock_timeout
+        self._generate = generate
+        self._table = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def make_key(budget, temperature, purpose, duration):
+        """Normalize the inputs so that 'low', 'Low' and ' LOW ' share an entry"""
+        duration = str(duration).strip().lower()
+        days = duration.split()[0] if duration else ''
+        if days.isdigit():
+            duration = f"{int(days)} days"
+        return '|'.join((
+            str(budget).strip().lower(),
+            str(temperature).strip().lower(),
+            str(purpose).strip().lower(),
+            duration
+        ))
+
+    def lookup(self, budget, temperature, purpose, duration):
+        """Return the precomputed recommendation, or None if the inputs are outside the grid"""
+        return self._table.get(self.make_key(budget, temperature, purpose, duration))
+
+    def __len__(self):
+        return len(self._table)
+
+    def load(self):
+        """Load the table from disk if a previous refresh saved one"""
+        try:
+            with open(self.path) as f:
+                self._table = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Error loading destination table: {str(e)}")
+
+    def _age(self):
+        """Seconds since the table file was written, None if there is none"""
+        try:
+            return time.time() - os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def is_stale(self):
+        age = self._age()
+        return age is None or age >= self.refresh_interval
+
+    def _acquire_lock(self):
+        """Create the lock file, False if another process holds it"""
+        directory = os.path.dirname(self.lock_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.lock_path) < self.lock_timeout:
+                        return False
+                    # Left behind by a process that died mid-refresh
+                    os.remove(self.lock_path)
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, 'w') as f:
+                f.write(str(os.getpid()))
+            return True
+        return False
+
+    def refresh(self):
+        """Regenerate every grid entry and atomically replace the table on disk"""
+        table = {}
+        for budget, temperature, purpose, duration in product(BUDGETS, TEMPERATURES, PURPOSES, DURATIONS):
+            if self._stop.is_set():
+                return
+            try:
+                recommendation = self._generate(budget, temperature, purpose, duration)
+            except Exception as e:
+                print(f"Error precomputing destination: {str(e)}")
+                recommendation = None
+            key = self.make_key(budget, temperature, purpose, duration)
+            if recommendation:
+                table[key] = recommendation
+            elif key in self._table:
+                # Keep the previous answer rather than losing the entry
+                table[key] = self._table[key]
+
+        self._table = table
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(table, f)
+        os.replace(tmp_path, self.path)
+
+    def start(self):
+        """Start the background thread that refreshes the table every refresh_interval seconds"""
+        if self._thread is not None or self.refresh_interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name='destination-table', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self._refresh_if_stale()):
+            pass
+
+    def _refresh_if_stale(self):
+        """Refresh or reload the table, returning the seconds until the next check"""
+        try:
+            age = self._age()
+            if age is not None and age < self.refresh_interval:
+                # Another process refreshed the file recently
+                self.load()
+                return max(1, self.refresh_interval - age)
+            if not self._acquire_lock():
+                # Another process is refreshing, pick up its file once written
+                return LOCK_POLL_INTERVAL
+            try:
+                if self.is_stale():
+                    self.refresh()
+                else:
+                    # Replaced between the age check and taking the lock
+                    self.load()
+            finally:
+                os.remove(self.lock_path)
+        except Exception as e:
+            print(f"Error refreshing destination table: {str(e)}")
+        return self.refresh_interval
@@ -0,0 +1,8 @@
+# gunicorn.conf.py
+# Read by gunicorn from the working directory, e.g. `gunicorn --workers 4 app:app`
+
+
+def post_worker_init(worker):
+    """Pick up plans stranded by a previous worker once this worker has loaded the app"""
+    from app import resume_plans_at_startup
+    resume_plans_at_startup()
@@ -0,0 +1,155 @@
+# itinerary_templates.py
+from functools import lru_cache
+
+DEFAULT_DAYS = 7
+
+# Morning, afternoon and evening of every templated day, per travel purpose
+DAY_TEMPLATES = {
+    'leisure': (
+        "Breakfast at hotel, then visit {destination} city center",
+        "Lunch at a local restaurant, then explore {destination} attractions",
+        "Dinner at a recommended restaurant, then evening entertainment"
+    ),
+    'adventure': (
+        "Early breakfast, then outdoor adventure activity in {destination}",
+        "Lunch on the go, then continue adventure activities",
+        "Dinner at a local restaurant, then relaxation"
+    ),
+    'cultural': (
+        "Breakfast at hotel, then visit cultural sites in {destination}",
+        "Lunch at a local restaurant, then continue cultural exploration",
+        "Dinner at a traditional restaurant, then cultural performance"
+    ),
+    'business': (
+        "Breakfast at hotel, then business meetings in {destination}",
+        "Lunch meeting, then continue business activities",
+        "Dinner meeting or networking event"
+    ),
+}
+DEFAULT_TEMPLATE = (
+    "Breakfast at hotel, then explore {destination}",
+    "Lunch at a local restaurant, then continue exploration",
+    "Dinner at a recommended restaurant, then evening activities"
+)
+
+# Everything besides the days, rendered once per destination
+DETAIL_TEMPLATES = {
+    "costs": {
+        "Accommodation": "$100-200 per night",
+        "Food": "$30-50 per day",
+        "Activities": "$20-40 per day",
+        "Transportation": "$10-30 per day"
+    },
+    "transportation": "Public transit, taxis, or rental car recommended",
+    "food": "Local restaurants and cafes recommended",
+    "cultural_experiences": [
+        "Visit local markets in {destination}",
+        "Experience local festivals in {destination}",
+        "Learn about local history in {destination}"
+    ],
+    "photo_spots": [
+        "City center of {destination}",
+        "Local landmarks in {destination}",
+        "Scenic viewpoints in {destination}"
+    ],
+    "alternatives": [
+        "Indoor museums in {destination}",
+        "Shopping centers in {destination}",
+        "Cafes and restaurants in {destination}"
+    ],
+    "packing_list": [
+        "Comfortable walking shoes",
+        "Weather-appropriate clothing",
+        "Camera or smartphone",
+        "Travel documents",
+        "Basic first aid kit"
+    ],
+    "health_safety": [
+        "Check travel advisories for {destination}",
+        "Keep valuables secure",
+        "Stay hydrated",
+        "Follow local health guidelines"
+    ]
+}
+
+
+def _compile(template):
+    """Turn nested template strings into str.format callables once, at import time"""
+    if isinstance(template, str):
+        return template.format if '{' in template else (lambda **_: template)
+    if isinstance(template, dict):
+        parts = {key: _compile(value) for key, value in template.items()}
+        return lambda **values: {key: part(**values) for key, part in parts.items()}
+    parts = [_compile(value) for value in template]
+    return lambda **values: [part(**values) for part in parts]
+
+
+_DAY_RENDERERS = {purpose: _compile(slots) for purpose, slots in DAY_TEMPLATES.items()}
+_DEFAULT_DAY_RENDERER = _compile(DEFAULT_TEMPLATE)
+_DETAIL_RENDERER = _compile(DETAIL_TEMPLATES)
+
+
+def destination_name(destination):
+    """Plans pass the whole destination recommendation, prompts and templates only need its name"""
+    if isinstance(destination, dict):
+        destination = destination.get('destination') or destination.get('recommendation') or ''
+    return str(destination)
+
+
+def _purpose_key(purpose):
+    return str(purpose or '').strip().lower()
+
+
+def _copy(value):
+    """Copy nested dicts and lists, sharing only the immutable leaves"""
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+class ItineraryTemplates:
+    """Template itineraries with a hard cap on days, memoized per (destination, days, purpose)
+
+    The rendered strings are memoized; every caller gets its own copy of the containers around them.
+    """
+
+    def __init__(self, max_days=30, cache_size=256):
+        self.max_days = max_days
+        self._render = lru_cache(maxsize=cache_size)(self._build)
+        self._slots = lru_cache(maxsize=cache_size)(self._build_slots)
+
+    def parse_days(self, duration):
+        """Number of days in a duration like '7 days', clamped to 1..max_days"""
+        words = str(duration).split()
+        try:
+            days = int(words[0]) if words and (len(words) == 1 or words[1].startswith('day')) else DEFAULT_DAYS
+        except ValueError:
+            days = DEFAULT_DAYS
+        return max(1, min(days, self.max_days))
+
+    def _build_slots(self, destination, purpose):
+        render = _DAY_RENDERERS.get(purpose, _DEFAULT_DAY_RENDERER)
+        return tuple(render(destination=destination))
+
+    def iter_days(self, destination, purpose, first_day=1, last_day=None):
+        """Lazily yield the templated days first_day..last_day (inclusive), never past max_days"""
+        morning, afternoon, evening = self._slots(destination_name(destination), _purpose_key(purpose))
+        last_day = self.max_days if last_day is None else min(last_day, self.max_days)
+        for day in range(max(1, first_day), last_day + 1):
+            yield {"day": day, "morning": morning, "afternoon": afternoon, "evening": evening}
+
+    def _build(self, destination, days, purpose, first_day, last_day):
+        itinerary = {"days": list(self.iter_days(destination, purpose, first_day, min(days, last_day or days)))}
+        itinerary.update(_DETAIL_RENDERER(destination=destination))
+        return itinerary
+
+    def render(self, destination, duration, purpose, first_day=1, last_day=None):
+        """Template itinerary for a trip, optionally limited to the days first_day..last_day"""
+        return _copy(self._render(
+            destination_name(destination), self.parse_days(duration), _purpose_key(purpose), first_day, last_day
+        ))
+
+    def cache_info(self):
+        return self._render.cache_info()
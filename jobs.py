@@ -0,0 +1,31 @@
+# jobs.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobQueueFull(Exception):
+    """Raised when a BoundedExecutor already holds its maximum number of jobs"""
+
+
+class BoundedExecutor:
+    """Thread pool that rejects new work instead of queueing it without limit"""
+
+    def __init__(self, max_workers, max_pending, name='worker'):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        # Counts jobs that are either queued or running
+        self._slots = threading.BoundedSemaphore(max(max_pending, max_workers))
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule fn(*args, **kwargs), raising JobQueueFull if there is no free slot"""
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,104 @@
+# leaderboard.py
+import bisect
+import threading
+import time
+
+
+class Leaderboard:
+    """In-memory top-N of public plans ordered by (likes, id) descending"""
+
+    def __init__(self, size=100, max_age=60):
+        self.size = size
+        self.max_age = max_age
+        self._keys = []  # ascending (-likes, -id), i.e. most liked first
+        self._plans = {}  # plan id -> serialized plan
+        self._complete = False  # True when every public plan is on the board
+        self._built_at = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(plan):
+        return (-(plan['likes'] or 0), -plan['id'])
+
+    def needs_rebuild(self):
+        with self._lock:
+            if self._built_at is None or time.monotonic() - self._built_at >= self.max_age:
+                return True
+            # Removals shrank an incomplete board too far to serve first pages
+            return not self._complete and len(self._keys) < self.size // 2
+
+    def rebuild(self, plans, complete):
+        """Replace the board with serialized plans already sorted by (likes, id) descending"""
+        plans = list(plans)[:self.size]
+        with self._lock:
+            self._plans = {plan['id']: plan for plan in plans}
+            self._keys = sorted(self._key(plan) for plan in plans)
+            self._complete = complete
+            self._built_at = time.monotonic()
+
+    def __contains__(self, plan_id):
+        with self._lock:
+            return plan_id in self._plans
+
+    def qualifies(self, likes, plan_id):
+        """Whether a plan not on the board would enter it with this many likes"""
+        with self._lock:
+            if self._built_at is None:
+                return False
+            if self._complete or not self._keys:
+                return self._complete
+            return (-(likes or 0), -plan_id) < self._keys[-1]
+
+    def set_likes(self, plan_id, likes):
+        """Update the like count of a plan on the board, returning False if it is not on it"""
+        with self._lock:
+            plan = self._plans.get(plan_id)
+            if plan is None:
+                return False
+            self._keys.remove(self._key(plan))
+            plan = dict(plan, likes=likes)
+            self._plans[plan_id] = plan
+            bisect.insort(self._keys, self._key(plan))
+            return True
+
+    def upsert(self, plan):
+        """Insert or refresh a serialized public plan, trimming the board back to its size"""
+        with self._lock:
+            if self._built_at is None:
+                return
+            old = self._plans.get(plan['id'])
+            if old is not None:
+                self._keys.remove(self._key(old))
+            elif not self._complete and self._keys and self._key(plan) > self._keys[-1]:
+                # Plans below the last entry of an incomplete board are unknown
+                return
+            self._plans[plan['id']] = plan
+            bisect.insort(self._keys, self._key(plan))
+            while len(self._keys) > self.size:
+                likes, plan_id = self._keys.pop()
+                del self._plans[-plan_id]
+                self._complete = False
+
+    def remove(self, plan_id):
+        """Drop a plan that was deleted or made private"""
+        with self._lock:
+            plan = self._plans.pop(plan_id, None)
+            if plan is not None:
+                self._keys.remove(self._key(plan))
+
+    def page(self, cursor, limit):
+        """Return (plans, next_cursor) for a page, or None if the board cannot answer it alone"""
+        with self._lock:
+            if self._built_at is None:
+                return None
+            start = 0
+            if cursor:
+                start = bisect.bisect_right(self._keys, (-cursor[0], -cursor[1]))
+            keys = self._keys[start:start + limit + 1]
+            if len(keys) <= limit and not self._complete:
+                return None
+            plans = [self._plans[-plan_id] for _, plan_id in keys[:limit]]
+            next_cursor = None
+            if len(keys) > limit:
+                next_cursor = (plans[-1]['likes'], plans[-1]['id'])
+            return plans, next_cursor
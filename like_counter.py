@@ -0,0 +1,81 @@
+# like_counter.py
+import threading
+from collections import defaultdict
+
+
+class LikeCounter:
+    """Buffers like increments in memory and hands them to a flush callback in batches"""
+
+    def __init__(self, flush, interval=5.0, max_pending=1000):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._flush = flush  # called with {plan_id: delta}
+        self._pending = defaultdict(int)
+        self._total = 0
+        self.version = 0  # bumped on every add, lets callers detect pending changes
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, plan_id, count=1):
+        """Record likes for a plan and return its pending delta"""
+        with self._lock:
+            self._pending[plan_id] += count
+            self._total += count
+            self.version += 1
+            pending = self._pending[plan_id]
+            if self._total >= self.max_pending:
+                self._wake.set()
+        return pending
+
+    def pending(self, plan_id):
+        """Likes recorded for a plan that have not been flushed yet"""
+        with self._lock:
+            return self._pending.get(plan_id, 0)
+
+    def discard(self, plan_id):
+        """Drop pending likes for a plan that no longer exists"""
+        with self._lock:
+            self._total -= self._pending.pop(plan_id, 0)
+
+    def flush(self):
+        """Write all pending likes through the flush callback, keeping them if it fails"""
+        with self._lock:
+            if not self._pending:
+                return
+            batch = dict(self._pending)
+            self._pending.clear()
+            self._total = 0
+        try:
+            self._flush(batch)
+        except Exception:
+            with self._lock:
+                for plan_id, count in batch.items():
+                    self._pending[plan_id] += count
+                    self._total += count
+            raise
+
+    def start(self):
+        """Start the background thread that flushes every interval seconds"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='like-counter', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and flush what is left"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing likes: {str(e)}")
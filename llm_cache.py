@@ -0,0 +1,94 @@
+# llm_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+
+class LLMResponseCache:
+    """In-process LRU cache of LLM completions with a per-entry TTL and a size limit in bytes"""
+
+    def __init__(self, max_entries=1024, max_bytes=16 * 1024 * 1024, ttl=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0 and self.ttl > 0
+
+    @staticmethod
+    def make_key(model, temperature, max_tokens, system_prompt, prompt):
+        """Build a cache key that ignores differences in whitespace"""
+        return (
+            model,
+            float(temperature) if temperature is not None else None,
+            max_tokens,
+            ' '.join(system_prompt.split()),
+            ' '.join(prompt.split())
+        )
+
+    @staticmethod
+    def _entry_size(key, value):
+        return len(value.encode('utf-8')) + len(key[3].encode('utf-8')) + len(key[4].encode('utf-8'))
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or an expired entry"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, size, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting least recently used entries to stay within limits"""
+        if not self.enabled or value is None:
+            return
+        size = self._entry_size(key, value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
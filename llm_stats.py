@@ -0,0 +1,97 @@
+# llm_stats.py
+import threading
+from collections import deque
+
+from metrics import Histogram
+
+# LLM latency buckets in seconds
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+
+
+def estimate_tokens(text):
+    """Rough token count for when the API does not report usage, about four characters per token"""
+    return (len(text) + 3) // 4 if text else 0
+
+
+class LLMStats:
+    """Per-route call counts, token usage and latency of LLM calls
+
+    Latency percentiles are computed over the last `window` calls of each route. With a
+    metrics registry, latencies are also observed in the llm_request_duration_seconds histogram.
+    """
+
+    def __init__(self, window=1024, registry=None):
+        self.window = window
+        self._routes = {}
+        self._lock = threading.Lock()
+        self.latency = Histogram(
+            'llm_request_duration_seconds', 'Latency of LLM calls including retries, by route',
+            labels=('route',), buckets=LATENCY_BUCKETS, registry=registry
+        )
+
+    def _route(self, route):
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = {
+                "calls": 0,
+                "errors": 0,
+                "cache_hits": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "estimated": 0,
+                "latency_total": 0.0,
+                "latencies": deque(maxlen=self.window)
+            }
+        return stats
+
+    def record(self, route, latency, prompt_tokens, completion_tokens, estimated=False):
+        """Record a completed call and the tokens it used"""
+        with self._lock:
+            stats = self._route(route)
+            stats["calls"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            stats["estimated"] += estimated
+            stats["latency_total"] += latency
+            stats["latencies"].append(latency)
+        self.latency.observe(latency, (route,))
+
+    def record_error(self, route, latency):
+        with self._lock:
+            stats = self._route(route)
+            stats["errors"] += 1
+            stats["latency_total"] += latency
+            stats["latencies"].append(latency)
+        self.latency.observe(latency, (route,))
+
+    def totals(self):
+        """Cumulative counters per route, cheaper than stats() for frequent scrapes"""
+        with self._lock:
+            return {
+                route: {key: stats[key] for key in ("calls", "errors", "cache_hits", "prompt_tokens", "completion_tokens")}
+                for route, stats in self._routes.items()
+            }
+
+    def record_cache_hit(self, route):
+        with self._lock:
+            self._route(route)["cache_hits"] += 1
+
+    def stats(self):
+        with self._lock:
+            snapshot = {route: dict(stats, latencies=sorted(stats["latencies"])) for route, stats in self._routes.items()}
+        result = {}
+        for route, stats in sorted(snapshot.items()):
+            latencies = stats.pop("latencies")
+            attempts = stats["calls"] + stats["errors"]
+            latency_total = stats.pop("latency_total")
+            result[route] = dict(
+                stats,
+                total_tokens=stats["prompt_tokens"] + stats["completion_tokens"],
+                avg_prompt_tokens=round(stats["prompt_tokens"] / stats["calls"], 1) if stats["calls"] else 0,
+                avg_completion_tokens=round(stats["completion_tokens"] / stats["calls"], 1) if stats["calls"] else 0,
+                latency_avg_ms=round(latency_total / attempts * 1e3, 1) if attempts else None,
+                latency_p50_ms=round(latencies[len(latencies) // 2] * 1e3, 1) if latencies else None,
+                latency_p95_ms=round(latencies[int(len(latencies) * 0.95)] * 1e3, 1) if latencies else None,
+                latency_max_ms=round(latencies[-1] * 1e3, 1) if latencies else None
+            )
+        return result
@@ -0,0 +1,99 @@
+# log_pipeline.py
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, has_request_context, request
+
+# Attributes every LogRecord has; anything else was passed through `extra` and ends up in the JSON line
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the record's extra fields alongside the message"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of the records tagged with extra={'event': name}, per event"""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = {event: rate for event, rate in rates.items() if rate < 1}
+
+    def filter(self, record):
+        rate = self.rates.get(getattr(record, 'event', None))
+        return rate is None or random.random() < rate
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the request id, method, route and time since the request started
+
+    Runs on the calling thread before the record is queued, since the listener has no request context.
+    """
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.method = request.method
+            record.route = request.url_rule.rule if request.url_rule is not None else request.path
+            if 'request_start' in g and not hasattr(record, 'latency_ms'):
+                record.elapsed_ms = round((time.perf_counter() - g.request_start) * 1e3, 1)
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Enqueue records as they are, leaving message formatting to the listener thread
+
+    Records are only shared within this process, so log arguments must not be mutated after the call.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(logger, path, max_bytes=10 * 1024 * 1024, backup_count=10, level=logging.INFO, sample_rates=None,
+                  console_handlers=()):
+    """Route logger through a queue to a rotating JSON-lines file written by a background listener
+
+    console_handlers (e.g. Flask's stderr handler) are moved behind the queue as well.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    file_handler.setFormatter(JsonFormatter())
+    file_handler.setLevel(level)
+
+    records = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(records)
+    queue_handler.setLevel(level)
+    queue_handler.addFilter(SamplingFilter(sample_rates or {}))
+    queue_handler.addFilter(RequestContextFilter())
+    logger.addHandler(queue_handler)
+
+    for handler in console_handlers:
+        logger.removeHandler(handler)
+    listener = QueueListener(records, file_handler, *console_handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,116 @@
+# migrations.py
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.exc import DBAPIError
+
+# Versioned schema changes, applied in order to databases created before them
+MIGRATIONS = []
+
+_version_table = Table(
+    'schema_version', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+
+def migration(version, description):
+    """Register fn(connection) as schema version `version`; it must be safe to run on a schema that already has it"""
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return fn
+    return register
+
+
+def _reflect(conn, name):
+    return Table(name, MetaData(), autoload_with=conn)
+
+
+def _create_index(conn, table, name, *columns, unique=False):
+    table = _reflect(conn, table)
+    if name not in {index['name'] for index in inspect(conn).get_indexes(table.name)}:
+        Index(name, *(table.c[column] for column in columns), unique=unique).create(conn)
+
+
+def _has_plan_status(conn):
+    return 'status' in {column['name'] for column in inspect(conn).get_columns('travel_plan')}
+
+
+@migration(1, 'Add travel_plan.status for asynchronous plan generation')
+def _add_plan_status(conn):
+    if not _has_plan_status(conn):
+        conn.execute(text("ALTER TABLE travel_plan ADD COLUMN status VARCHAR(20) NOT NULL DEFAULT 'ready'"))
+
+
+def ensure_plan_status(engine):
+    """Apply migration 1 on its own, run by every process at startup since every plan query selects the column
+
+    Several workers may race to add it; losing the race is fine as long as the column exists afterwards.
+    """
+    try:
+        with engine.begin() as conn:
+            if inspect(conn).has_table('travel_plan'):
+                _add_plan_status(conn)
+    except DBAPIError:
+        with engine.connect() as conn:
+            if not _has_plan_status(conn):
+                raise
+
+
+@migration(2, 'Index travel_plan on (user_id, created_at, id) for the plan list')
+def _index_plan_user(conn):
+    _create_index(conn, 'travel_plan', 'ix_travel_plan_user_created', 'user_id', 'created_at', 'id')
+
+
+@migration(3, 'Index travel_plan on (is_public, likes, id) for public plans')
+def _index_plan_public_likes(conn):
+    _create_index(conn, 'travel_plan', 'ix_travel_plan_public_likes', 'is_public', 'likes', 'id')
+
+
+@migration(4, 'Make favorite (user_id, plan_id) unique')
+def _unique_favorite(conn):
+    favorite = _reflect(conn, 'favorite')
+    # Keep the oldest of any duplicated favorites, the unique index would fail on them
+    keep = select(func.min(favorite.c.id)).group_by(favorite.c.user_id, favorite.c.plan_id)
+    conn.execute(favorite.delete().where(favorite.c.id.not_in(keep)))
+    _create_index(conn, 'favorite', 'uq_favorite_user_plan', 'user_id', 'plan_id', unique=True)
+
+
+@migration(5, 'Index favorite on (user_id, created_at, id) for the favorites list')
+def _index_favorite_user_created(conn):
+    _create_index(conn, 'favorite', 'ix_favorite_user_created', 'user_id', 'created_at', 'id')
+
+
+def current_version(conn):
+    if not inspect(conn).has_table(_version_table.name):
+        return 0
+    return conn.execute(select(func.max(_version_table.c.version))).scalar() or 0
+
+
+def upgrade(engine, create_all, log=print):
+    """Bring the database up to the latest version and return it
+
+    Empty databases are created from the models by create_all() and stamped with the latest
+    version; existing ones get every pending migration, each in its own transaction.
+    """
+    with engine.begin() as conn:
+        fresh = not inspect(conn).has_table('travel_plan')
+    if fresh:
+        create_all()
+    with engine.begin() as conn:
+        _version_table.create(conn, checkfirst=True)
+        version = current_version(conn)
+    for number, description, fn in MIGRATIONS:
+        if number <= version:
+            continue
+        with engine.begin() as conn:
+            if not fresh:
+                log(f"Applying migration {number}: {description}")
+                fn(conn)
+            conn.execute(_version_table.insert().values(
+                version=number, description=description, applied_at=datetime.utcnow()
+            ))
+        version = number
+    return version
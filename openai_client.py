@@ -0,0 +1,146 @@
+# openai_client.py
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+import openai
+from openai import OpenAI
+from dotenv import load_dotenv
+from circuit_breaker import CircuitBreaker, CircuitOpen
+from llm_stats import LLMStats, estimate_tokens
+from metrics import registry as metrics_registry
+
+# Load environment variables
+load_dotenv()
+
+CONNECT_TIMEOUT = float(os.getenv('OPENAI_CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.getenv('OPENAI_READ_TIMEOUT', 30))
+MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', 2))
+RETRY_BASE_DELAY = float(os.getenv('OPENAI_RETRY_BASE_DELAY', 0.5))
+RETRY_MAX_DELAY = float(os.getenv('OPENAI_RETRY_MAX_DELAY', 8))
+MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', 8))
+QUEUE_TIMEOUT = float(os.getenv('OPENAI_QUEUE_TIMEOUT', 10))
+MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', 20))
+KEEPALIVE_EXPIRY = float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', 30))
+
+# Errors worth another attempt; anything else is returned to the caller immediately
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,  # includes APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+_client = None
+_client_lock = threading.Lock()
+_upstream_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+
+# Tracks upstream errors and latency so callers can skip OpenAI while it is unhealthy
+upstream_breaker = CircuitBreaker(
+    failure_rate=float(os.getenv('OPENAI_BREAKER_FAILURE_RATE', 0.5)),
+    min_calls=int(os.getenv('OPENAI_BREAKER_MIN_CALLS', 10)),
+    window=float(os.getenv('OPENAI_BREAKER_WINDOW', 30)),
+    slow_call=float(os.getenv('OPENAI_BREAKER_SLOW_CALL', 15)),
+    open_duration=float(os.getenv('OPENAI_BREAKER_OPEN_DURATION', 30))
+)
+
+# Calls, tokens and latency per route, filled in by create_chat_completion
+llm_stats = LLMStats(registry=metrics_registry)
+
+
+class UpstreamBusy(Exception):
+    """Raised when no upstream slot frees up within OPENAI_QUEUE_TIMEOUT"""
+
+
+def get_openai_client():
+    """Return the process-wide OpenAI client, or None if no API key is configured"""
+    global _client
+    if _client is not None:
+        return _client
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        return None
+    with _client_lock:
+        if _client is None:
+            http_client = httpx.Client(
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY
+                )
+            )
+            _client = OpenAI(
+                api_key=api_key,
+                base_url=os.getenv('OPENAI_BASE_URL') or None,
+                http_client=http_client,
+                # Retries are handled by create_chat_completion
+                max_retries=0
+            )
+    return _client
+
+
+@contextmanager
+def upstream_slot():
+    """Hold one of the OPENAI_MAX_CONCURRENCY upstream request slots, failing fast while the circuit is open"""
+    if not upstream_breaker.allow():
+        raise CircuitOpen("OpenAI circuit is open")
+    if not _upstream_slots.acquire(timeout=QUEUE_TIMEOUT):
+        upstream_breaker.cancel()
+        raise UpstreamBusy("Too many concurrent OpenAI requests")
+    start = time.monotonic()
+    failed = False
+    try:
+        yield
+    except RETRYABLE_ERRORS:
+        failed = True
+        raise
+    finally:
+        _upstream_slots.release()
+        # Any other outcome means OpenAI answered, only its latency counts against it
+        if failed:
+            upstream_breaker.record_failure(time.monotonic() - start)
+        else:
+            upstream_breaker.record_success(time.monotonic() - start)
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter for the given retry attempt"""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def usage_tokens(usage, messages, content):
+    """(prompt_tokens, completion_tokens, estimated) from a response's usage, estimated when it is missing"""
+    if usage is not None and getattr(usage, 'prompt_tokens', None) is not None:
+        return usage.prompt_tokens, usage.completion_tokens or 0, False
+    prompt = ''.join(message.get('content') or '' for message in messages)
+    return estimate_tokens(prompt), estimate_tokens(content), True
+
+
+def create_chat_completion(client, route='other', **kwargs):
+    """Call client.chat.completions.create with bounded concurrency and jittered retries, recording usage under route"""
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            with upstream_slot():
+                response = client.chat.completions.create(**kwargs)
+            break
+        except RETRYABLE_ERRORS:
+            if attempt >= MAX_RETRIES:
+                llm_stats.record_error(route, time.monotonic() - start)
+                raise
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+        except Exception:
+            llm_stats.record_error(route, time.monotonic() - start)
+            raise
+
+    content = response.choices[0].message.content if response.choices else None
+    prompt_tokens, completion_tokens, estimated = usage_tokens(
+        getattr(response, 'usage', None), kwargs.get('messages', ()), content
+    )
+    llm_stats.record(route, time.monotonic() - start, prompt_tokens, completion_tokens, estimated)
+    return response
@@ -0,0 +1,54 @@
+# pagination.py
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last returned row as an opaque cursor"""
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, types):
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+
+    decoded = []
+    for value, kind in zip(values, types):
+        try:
+            decoded.append(datetime.fromisoformat(value) if kind is datetime else kind(value))
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+    return decoded
+
+
+def after_cursor(columns, values):
+    """Filter selecting rows strictly after values when ordering by columns descending"""
+    # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y)
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, column < values[i]))
+    return or_(*clauses)
+
+
+def parse_limit(value, default, maximum):
+    """Parse a page size from the query string, raising ValueError if it is not a positive integer"""
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, maximum)
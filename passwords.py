@@ -0,0 +1,65 @@
+# passwords.py
+import base64
+import hashlib
+import hmac
+import os
+
+from jobs import BoundedExecutor
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+class PasswordHasher:
+    """scrypt password hashing run on a bounded thread pool, with rehash when cost parameters change
+
+    Hashes are stored as scrypt$<n>$<r>$<p>$<salt>$<hash>. Stored values in any other
+    format are treated as legacy plaintext and upgraded on the next successful login.
+    """
+
+    def __init__(self, n=2 ** 14, r=8, p=1, max_workers=2, max_pending=64):
+        self.n = n
+        self.r = r
+        self.p = p
+        # hashlib releases the GIL while scrypt runs, the pool caps how many run at once
+        self._executor = BoundedExecutor(max_workers=max_workers, max_pending=max_pending, name='password-hasher')
+        # Hash of a random password for verify_missing, built in the background so no login waits for it
+        self._dummy_hash = self._executor.submit(self._hash, _b64(os.urandom(16)))
+
+    def _derive(self, password, salt, n, r, p):
+        maxmem = 128 * r * (n + p + 2) + 1024 * 1024
+        return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=32)
+
+    def _hash(self, password):
+        salt = os.urandom(16)
+        derived = self._derive(password, salt, self.n, self.r, self.p)
+        return f"scrypt${self.n}${self.r}${self.p}${_b64(salt)}${_b64(derived)}"
+
+    def _verify(self, password, stored):
+        parts = stored.split('$')
+        if len(parts) != 6 or parts[0] != 'scrypt':
+            # Legacy plaintext password
+            ok = hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+            return ok, self._hash(password) if ok else None
+
+        n, r, p = (int(value) for value in parts[1:4])
+        salt = base64.b64decode(parts[4])
+        expected = base64.b64decode(parts[5])
+        ok = hmac.compare_digest(self._derive(password, salt, n, r, p), expected)
+        if ok and (n, r, p) != (self.n, self.r, self.p):
+            return ok, self._hash(password)
+        return ok, None
+
+    def hash(self, password):
+        """Hash a new password, raising JobQueueFull if the pool is saturated"""
+        return self._executor.submit(self._hash, password).result()
+
+    def verify(self, password, stored):
+        """Return (matches, new_hash), where new_hash is set when the stored value should be upgraded"""
+        return self._executor.submit(self._verify, password, stored).result()
+
+    def verify_missing(self, password):
+        """Spend the same scrypt work as verify() for an unknown account, so response time does not reveal which emails exist"""
+        self.verify(password, self._dummy_hash.result())
+        return False, None
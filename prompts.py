@@ -0,0 +1,32 @@
+# prompts.py
+import re
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def compact(text):
+    """Collapse runs of whitespace in free-form text to single spaces"""
+    return _WHITESPACE.sub(' ', str(text)).strip()
+
+
+def _value(value):
+    if isinstance(value, dict):
+        return ', '.join(f"{key}={compact(item)}" for key, item in value.items() if item not in (None, ''))
+    if isinstance(value, (list, tuple)):
+        return ', '.join(compact(item) for item in value)
+    return compact(value)
+
+
+def build_prompt(task, fields, keys):
+    """Compact prompt: the task, one 'Label: value' line per non-empty field and the JSON keys to answer with
+
+    keys are names or (name, description) pairs.
+    """
+    lines = [task]
+    for label, value in fields:
+        value = _value(value) if value is not None else ''
+        if value:
+            lines.append(f"{label}: {value}")
+    keys = ', '.join(key if isinstance(key, str) else f"{key[0]} ({key[1]})" for key in keys)
+    lines.append(f"Reply with only a JSON object with keys: {keys}. Keep values brief.")
+    return '\n'.join(lines)
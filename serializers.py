@@ -0,0 +1,83 @@
+# serializers.py
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+
+def dumps(obj):
+    """Encode obj as JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':'), default=str).encode('utf-8')
+
+
+class PlanSerializer:
+    """Turns TravelPlan rows into JSON, caching the encoded itinerary per plan revision"""
+
+    FIELDS = ('id', 'title', 'destination', 'start_date', 'end_date', 'budget', 'preferences',
+              'itinerary', 'created_at', 'updated_at', 'is_public', 'likes', 'status')
+
+    VIEWS = {
+        'detail': FIELDS,
+        'public': ('id', 'title', 'destination', 'start_date', 'end_date', 'budget', 'preferences',
+                   'itinerary', 'created_at', 'likes'),
+        'summary': ('id', 'title', 'destination', 'start_date', 'end_date', 'is_public', 'likes'),
+    }
+
+    def __init__(self, likes_delta=None, cache_size=512):
+        self._likes_delta = likes_delta  # plan id -> likes not yet written to the database
+        self._cache_size = cache_size
+        self._itineraries = OrderedDict()  # (plan id, updated_at) -> encoded itinerary
+        self._lock = threading.Lock()
+
+    def fields(self, view):
+        return self.VIEWS[view]
+
+    def to_dict(self, plan, fields):
+        """Serialize the given fields of a plan to a JSON-compatible dict"""
+        data = {}
+        for field in fields:
+            value = getattr(plan, field)
+            data[field] = value.isoformat() if isinstance(value, datetime) else value
+        if 'likes' in data:
+            data['likes'] = (data['likes'] or 0) + (self._likes_delta(plan.id) if self._likes_delta else 0)
+        return data
+
+    def encode(self, plan, fields):
+        """Encode one plan as JSON bytes, reusing the cached itinerary encoding"""
+        if 'itinerary' not in fields:
+            return dumps(self.to_dict(plan, fields))
+        data = self.to_dict(plan, [field for field in fields if field != 'itinerary'])
+        head = dumps(data)
+        separator = b',' if data else b''
+        return head[:-1] + separator + b'"itinerary":' + self._itinerary_bytes(plan) + b'}'
+
+    def encode_many(self, plans, fields):
+        """Encode a list of plans as a JSON array"""
+        return b'[' + b','.join(self.encode(plan, fields) for plan in plans) + b']'
+
+    def has_itinerary(self, plan_id, updated_at):
+        """Whether the itinerary of this plan revision is cached, so encoding it needs no itinerary column"""
+        with self._lock:
+            return (plan_id, updated_at) in self._itineraries
+
+    def _itinerary_bytes(self, plan):
+        key = (plan.id, plan.updated_at)
+        with self._lock:
+            encoded = self._itineraries.get(key)
+            if encoded is not None:
+                self._itineraries.move_to_end(key)
+                return encoded
+        encoded = dumps(plan.itinerary)
+        if self._cache_size > 0:
+            with self._lock:
+                self._itineraries[key] = encoded
+                while len(self._itineraries) > self._cache_size:
+                    self._itineraries.popitem(last=False)
+        return encoded
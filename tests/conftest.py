@@ -0,0 +1,91 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+# The app configures itself from the environment at import time
+_workdir = tempfile.mkdtemp(prefix='travelplanner-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_workdir, 'travelplanner.db')
+os.environ['LOG_FILE'] = os.path.join(_workdir, 'travelplanner.log')
+os.environ['DESTINATION_TABLE_PATH'] = os.path.join(_workdir, 'destination_table.json')
+os.environ['DESTINATION_TABLE_REFRESH'] = '0'
+os.environ['OPENAI_API_KEY'] = ''  # never call OpenAI, the local fallbacks answer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app as travelplanner  # noqa: E402
+from flask_jwt_extended.utils import create_access_token  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """The app with an empty database created from the models"""
+    with travelplanner.app.app_context():
+        travelplanner.db.drop_all()
+        travelplanner.db.create_all()
+    yield travelplanner.app
+    with travelplanner.app.app_context():
+        travelplanner.db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def db(app):
+    with app.app_context():
+        yield travelplanner.db
+
+
+def auth_headers(user_id):
+    with travelplanner.app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+
+
+def add_user(db, email):
+    user = travelplanner.User(email=email, password='unused', full_name=email.split('@')[0])
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def add_plans(db, user_id, count, is_public=True):
+    start = datetime(2026, 1, 1)
+    plans = [
+        travelplanner.TravelPlan(
+            user_id=user_id,
+            title=f'Plan {i}',
+            destination='Lisbon',
+            start_date=start,
+            end_date=start + timedelta(days=3),
+            budget=1000,
+            preferences={'budget': 'medium', 'purpose': 'leisure'},
+            itinerary={'days': [{'day': 1, 'morning': 'Walk'}]},
+            is_public=is_public
+        )
+        for i in range(count)
+    ]
+    db.session.add_all(plans)
+    db.session.commit()
+    return [plan.id for plan in plans]
+
+
+@contextmanager
+def count_statements(db):
+    """Collect the SQL statements run on the primary engine inside the block"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
@@ -0,0 +1,41 @@
+# tests/test_favorites.py
+from conftest import add_plans, add_user, auth_headers, count_statements, travelplanner
+
+
+def _favorite(db, user_id, plan_ids):
+    db.session.add_all(travelplanner.Favorite(user_id=user_id, plan_id=plan_id) for plan_id in plan_ids)
+    db.session.commit()
+
+
+def _favorites_statements(client, db, user_id):
+    with count_statements(db) as statements:
+        response = client.get('/api/favorites', headers=auth_headers(user_id))
+    assert response.status_code == 200
+    return len(statements), response.get_json()
+
+
+def test_favorites_statement_count_does_not_grow_with_favorites(client, db):
+    owner = add_user(db, 'owner@example.com')
+    plan_ids = add_plans(db, owner, 25)
+    one, many = add_user(db, 'one@example.com'), add_user(db, 'many@example.com')
+    _favorite(db, one, plan_ids[:1])
+    _favorite(db, many, plan_ids)
+
+    one_count, one_body = _favorites_statements(client, db, one)
+    many_count, many_body = _favorites_statements(client, db, many)
+
+    assert len(one_body) == 1
+    assert len(many_body) == 25
+    assert one_count == many_count
+
+
+def test_favorites_include_plan_fields(client, db):
+    owner = add_user(db, 'owner@example.com')
+    plan_ids = add_plans(db, owner, 2)
+    user = add_user(db, 'user@example.com')
+    _favorite(db, user, plan_ids)
+
+    _, body = _favorites_statements(client, db, user)
+
+    assert sorted(plan['id'] for plan in body) == sorted(plan_ids)
+    assert all(plan['destination'] == 'Lisbon' and plan['itinerary'] for plan in body)
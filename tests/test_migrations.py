@@ -0,0 +1,92 @@
+# tests/test_migrations.py
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+
+import migrations
+from conftest import travelplanner
+
+TravelPlan, Favorite = travelplanner.TravelPlan, travelplanner.Favorite
+
+# Schema as db.create_all() built it before migrations existed: no status column, no indexes
+BASELINE_SCHEMA = """
+CREATE TABLE user (
+    id INTEGER PRIMARY KEY, email VARCHAR(120) NOT NULL UNIQUE, password VARCHAR(120) NOT NULL,
+    full_name VARCHAR(120) NOT NULL, created_at DATETIME
+);
+CREATE TABLE travel_plan (
+    id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES user (id), title VARCHAR(120) NOT NULL,
+    destination VARCHAR(120) NOT NULL, start_date DATETIME NOT NULL, end_date DATETIME NOT NULL,
+    budget FLOAT NOT NULL, preferences JSON NOT NULL, itinerary JSON, created_at DATETIME,
+    updated_at DATETIME, is_public BOOLEAN, likes INTEGER
+);
+CREATE TABLE favorite (
+    id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES user (id),
+    plan_id INTEGER NOT NULL REFERENCES travel_plan (id), created_at DATETIME
+);
+INSERT INTO user VALUES (1, 'a@example.com', 'x', 'A', '2026-01-01');
+INSERT INTO travel_plan VALUES
+    (1, 1, 'T', 'Lisbon', '2026-01-01', '2026-01-04', 100, '{}', NULL, '2026-01-01', '2026-01-01', 1, 3);
+INSERT INTO favorite VALUES (1, 1, 1, '2026-01-01'), (2, 1, 1, '2026-01-02');
+"""
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """A baseline database brought up to date by the migrations"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with engine.begin() as conn:
+        for statement in BASELINE_SCHEMA.split(';'):
+            if statement.strip():
+                conn.execute(text(statement))
+    migrations.upgrade(engine, create_all=lambda: pytest.fail('baseline database treated as empty'), log=lambda _: None)
+    yield engine
+    engine.dispose()
+
+
+def _query_plan(engine, query):
+    sql = str(query.compile(engine, compile_kwargs={'literal_binds': True}))
+    with engine.connect() as conn:
+        return ' | '.join(row[-1] for row in conn.execute(text(f'EXPLAIN QUERY PLAN {sql}')))
+
+
+def test_upgrade_applies_every_migration(engine):
+    with engine.connect() as conn:
+        assert migrations.current_version(conn) == migrations.MIGRATIONS[-1][0]
+        assert 'status' in {column['name'] for column in inspect(conn).get_columns('travel_plan')}
+        # Duplicate favorites are collapsed before the unique index is built
+        assert conn.execute(text('SELECT id FROM favorite')).fetchall() == [(1,)]
+
+
+def test_upgrade_is_idempotent(engine):
+    version = migrations.upgrade(engine, create_all=lambda: None, log=lambda _: None)
+    assert version == migrations.MIGRATIONS[-1][0]
+
+
+def test_plan_list_uses_user_index(engine):
+    plan = _query_plan(engine, select(TravelPlan.id, TravelPlan.title).where(TravelPlan.user_id == 1).order_by(
+        TravelPlan.created_at.desc(), TravelPlan.id.desc()
+    ).limit(51))
+    assert 'ix_travel_plan_user_created' in plan
+    assert 'SCAN' not in plan and 'TEMP B-TREE' not in plan
+
+
+def test_public_plans_use_likes_index(engine):
+    plan = _query_plan(engine, select(TravelPlan.id, TravelPlan.title).filter_by(is_public=True).order_by(
+        TravelPlan.likes.desc(), TravelPlan.id.desc()
+    ).limit(51))
+    assert 'ix_travel_plan_public_likes' in plan
+    assert 'SCAN' not in plan and 'TEMP B-TREE' not in plan
+
+
+def test_favorite_probe_uses_unique_index(engine):
+    plan = _query_plan(engine, select(Favorite.id).where(Favorite.user_id == 1, Favorite.plan_id == 1).limit(1))
+    assert 'uq_favorite_user_plan' in plan
+    assert 'SCAN' not in plan
+
+
+def test_favorites_list_uses_created_index(engine):
+    plan = _query_plan(engine, select(TravelPlan.id, Favorite.created_at, Favorite.id).join(
+        Favorite, Favorite.plan_id == TravelPlan.id
+    ).where(Favorite.user_id == 1).order_by(Favorite.created_at.desc(), Favorite.id.desc()).limit(51))
+    assert 'ix_favorite_user_created' in plan
+    assert 'SCAN' not in plan and 'TEMP B-TREE' not in plan